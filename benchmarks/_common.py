@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Shared helpers for the BlendMark benchmarks: timing and memory measurement,
+command line options and the JSON results file that compare.py reads.
+"""
+
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_module(name, relative_path):
+    """
+    Load a single add-on module by path, without importing the add-on package
+    (whose __init__ needs bpy). Only works for modules without relative imports.
+    """
+    import importlib.util
+    spec = importlib.util.spec_from_file_location(name, os.path.join(REPO_DIR, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def parse_sizes(text):
+    """'1k,100k,1M' -> [1000, 100000, 1000000]."""
+    multipliers = {"k": 1000, "m": 1000000}
+    sizes = []
+    for item in text.split(","):
+        item = item.strip().lower()
+        if not item:
+            continue
+        factor = multipliers.get(item[-1], 1)
+        sizes.append(int(float(item[:-1] if factor != 1 else item) * factor))
+    return sizes
+
+
+def argument_parser(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--out", help="Write the results as JSON to this file (default: stdout only)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case (default: 5)")
+    parser.add_argument("--workdir", help="Directory for generated files (default: a temporary directory)")
+    return parser
+
+
+def script_args():
+    """Command line arguments, skipping Blender's own ('blender ... --python x.py -- <args>')."""
+    if "--" in sys.argv:
+        return sys.argv[sys.argv.index("--") + 1:]
+    return sys.argv[1:]
+
+
+def _max_rss_bytes():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS.
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def measure(name, size, func, setup=None, repeat=5):
+    """
+    Time `func(state)` `repeat` times, where state is `setup()` (re-run before
+    every call, untimed) or None. Python and NumPy allocations are traced on
+    one extra run to report the peak memory of a single call.
+    """
+    times = []
+    for _ in range(repeat):
+        state = setup() if setup is not None else None
+        gc.collect()
+        start = time.perf_counter()
+        func(state)
+        times.append(time.perf_counter() - start)
+        del state
+
+    state = setup() if setup is not None else None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(state)
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del state
+
+    result = {
+        "name": name,
+        "size": size,
+        "repeat": repeat,
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "mean_s": statistics.fmean(times),
+        "peak_alloc_bytes": peak,
+        "max_rss_bytes": _max_rss_bytes(),
+    }
+    print(f"{name:<32} {size:>10}  min {result['min_s'] * 1e3:10.3f} ms  "
+          f"median {result['median_s'] * 1e3:10.3f} ms  peak {peak / 1e6:9.2f} MB", flush=True)
+    return result
+
+
+def environment(**extra):
+    import numpy as np
+    env = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+    env.update(extra)
+    return env
+
+
+def write_results(path, suite, results, **env):
+    data = {"suite": suite, "environment": environment(**env), "results": results}
+    if path:
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+        print(f"Results written to '{path}'")
+    return data
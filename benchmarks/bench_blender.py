@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of the add-on code that needs Blender: curve resampling, edge path
+ordering and picking on the target surface. Run in a background Blender:
+
+    blender --background --factory-startup --python benchmarks/bench_blender.py -- \\
+        --points 1k,10k,100k,1M --triangles 10k,100k,1M,10M --out blender.json
+
+Picking uses a synthetic height-field mesh seen through a fixed perspective
+view; the BVH tree build is timed separately from the ray casts.
+"""
+
+import importlib.util
+import math
+import os
+import sys
+from types import SimpleNamespace
+
+import bmesh
+import bpy
+import numpy as np
+from mathutils import Matrix, Vector
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _common import REPO_DIR, argument_parser, measure, parse_sizes, script_args, write_results  # noqa: E402
+
+# The add-on package, imported from this checkout (not registered).
+_spec = importlib.util.spec_from_file_location(
+    "blendmark_bench", os.path.join(REPO_DIR, "__init__.py"), submodule_search_locations=[REPO_DIR],
+)
+blendmark = importlib.util.module_from_spec(_spec)
+sys.modules[_spec.name] = blendmark
+_spec.loader.exec_module(blendmark)
+raycast = blendmark.core.raycast
+utils = blendmark.core.utils
+
+_REGION_SIZE = (1920, 1080)
+_PICKS = 1000
+_BATCH_CURVES = 100
+
+
+def synthetic_polyline(count, seed=0):
+    """A wiggly open 3D curve of `count` vertices, as a list of Vector."""
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0.0, 4.0 * math.pi, count)
+    co = np.column_stack([np.cos(t) * (1.0 + 0.1 * t), np.sin(t), t * 0.2])
+    co += rng.normal(scale=1e-3, size=co.shape)
+    return [Vector(p) for p in co.tolist()]
+
+
+def synthetic_path_bmesh(count, seed=0):
+    """A bmesh holding one selected open edge path of `count` vertices, created in random order."""
+    rng = np.random.default_rng(seed)
+    bm = bmesh.new()
+    order = rng.permutation(count)
+    verts = [None] * count
+    for i in order.tolist():
+        verts[i] = bm.verts.new((i * 0.01, 0.0, 0.0))
+    for i in rng.permutation(count - 1).tolist():
+        bm.edges.new((verts[i], verts[i + 1])).select = True
+    return bm
+
+
+def synthetic_heightfield(triangles):
+    """A mesh object with about `triangles` triangles over [-1, 1]^2, linked to the scene."""
+    rows = max(1, int(math.sqrt(triangles / 2.0)))
+    x, y = np.meshgrid(np.linspace(-1.0, 1.0, rows + 1), np.linspace(-1.0, 1.0, rows + 1))
+    z = 0.05 * np.sin(8.0 * x) * np.cos(6.0 * y)
+    co = np.column_stack([x.ravel(), y.ravel(), z.ravel()]).astype(np.float32)
+
+    cell = (np.arange(rows)[:, None] * (rows + 1) + np.arange(rows)[None, :]).ravel()
+    a, b, c, d = cell, cell + 1, cell + rows + 2, cell + rows + 1
+    tris = np.concatenate([np.column_stack([a, b, c]), np.column_stack([a, c, d])]).astype(np.int32)
+
+    mesh = bpy.data.meshes.new(f"bench_{len(tris)}")
+    mesh.vertices.add(len(co))
+    mesh.vertices.foreach_set("co", co.ravel())
+    mesh.loops.add(tris.size)
+    mesh.loops.foreach_set("vertex_index", tris.ravel())
+    mesh.polygons.add(len(tris))
+    mesh.polygons.foreach_set("loop_start", np.arange(0, tris.size, 3, dtype=np.int32))
+    mesh.update()
+    obj = bpy.data.objects.new(mesh.name, mesh)
+    bpy.context.scene.collection.objects.link(obj)
+    return obj
+
+
+def synthetic_view(distance=3.0, fov=math.radians(50.0)):
+    """
+    Stand-ins for a 3D View region and its RegionView3D, looking down -Z at
+    the height field: all view3d_utils reads from them is their size and
+    view/perspective matrices.
+    """
+    width, height = _REGION_SIZE
+    near, far = 0.01, 100.0
+    f = 1.0 / math.tan(fov / 2.0)
+    window_matrix = Matrix((
+        (f * height / width, 0.0, 0.0, 0.0),
+        (0.0, f, 0.0, 0.0),
+        (0.0, 0.0, (far + near) / (near - far), 2.0 * far * near / (near - far)),
+        (0.0, 0.0, -1.0, 0.0),
+    ))
+    view_matrix = Matrix.Translation((0.0, 0.0, -distance))
+    region = SimpleNamespace(width=width, height=height)
+    rv3d = SimpleNamespace(
+        view_matrix=view_matrix, perspective_matrix=window_matrix @ view_matrix, is_perspective=True,
+    )
+    return region, rv3d
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument("--points", default="1k,10k,100k,1M",
+                        help="Polyline / edge path vertex counts (default: 1k,10k,100k,1M)")
+    parser.add_argument("--samples", type=int, default=100, help="Points resample_polyline produces (default: 100)")
+    parser.add_argument("--triangles", default="10k,100k,1M,10M", help="Target mesh sizes (default: 10k,100k,1M,10M)")
+    parser.add_argument("--proxy-faces", type=int, default=200000,
+                        help="Face budget of the interactive proxy picking case (default: 200000)")
+    args = parser.parse_args(script_args())
+
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    results = []
+
+    for count in parse_sizes(args.points):
+        polyline = synthetic_polyline(count)
+        results.append(measure("resample_polyline", count,
+                               lambda _state: utils.resample_polyline(polyline, args.samples), repeat=args.repeat))
+        results[-1]["samples"] = args.samples
+        del polyline
+
+        # The same vertices split over _BATCH_CURVES curves, resampled in one call.
+        curves = [np.asarray(c) for c in np.array_split(np.asarray(synthetic_polyline(count)), _BATCH_CURVES)]
+        results.append(measure("resample_polylines", count,
+                               lambda _state: utils.resample_polylines(curves, args.samples), repeat=args.repeat))
+        results[-1].update(samples=args.samples, curves=_BATCH_CURVES)
+        del curves
+
+        results.append(measure("order_selected_edge_path", count, lambda bm: utils.order_selected_edge_path(bm),
+                               setup=lambda: synthetic_path_bmesh(count), repeat=args.repeat))
+
+    region, rv3d = synthetic_view()
+    rng = np.random.default_rng(0)
+    coords = (rng.random((_PICKS, 2)) * _REGION_SIZE).tolist()
+
+    def pick_all(target, proxy_faces):
+        for coord in coords:
+            utils.pick_target_point(target, region, rv3d, coord, proxy_faces=proxy_faces)
+
+    for triangles in parse_sizes(args.triangles):
+        target = synthetic_heightfield(triangles)
+
+        def cold(_state):
+            raycast.invalidate(target)
+            raycast.target_bvh(target)
+
+        results.append(measure("target_bvh build", triangles, cold, repeat=args.repeat))
+        raycast.target_bvh(target)
+        results.append(measure("pick_target_point", triangles, lambda _state: pick_all(target, 0), repeat=args.repeat))
+        results[-1]["picks"] = _PICKS
+
+        raycast.proxy_bvh(target, args.proxy_faces)
+        results.append(measure("pick_target_point[proxy]", triangles,
+                               lambda _state: pick_all(target, args.proxy_faces), repeat=args.repeat))
+        results[-1].update(picks=_PICKS, proxy_faces=args.proxy_faces)
+
+        raycast.invalidate(target)
+        mesh = target.data
+        bpy.data.objects.remove(target)
+        bpy.data.meshes.remove(mesh)
+
+    write_results(args.out, "blender", results, blender=bpy.app.version_string)
+
+
+if __name__ == "__main__":
+    main()
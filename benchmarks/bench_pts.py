@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+.pts parsing/writing benchmarks. These only need NumPy and run in plain Python:
+
+    python benchmarks/bench_pts.py --points 1k,10k,100k,1M --out pts.json
+
+Synthetic studies mix fixed landmarks and semilandmark curves; every case is
+run on plain and gzip (and zstd, when available) compressed files.
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+from _common import argument_parser, load_module, measure, parse_sizes, script_args, write_results
+
+pts_format = load_module("pts_format", os.path.join("core", "pts_format.py"))
+
+# Fixed landmarks per synthetic specimen; the rest are semilandmarks on
+# curves of _CURVE_POINTS points each.
+_LANDMARKS = 50
+_CURVE_POINTS = 100
+
+
+def synthetic_arrays(count, seed=0):
+    """Point arrays (see landmark_data.POINT_FIELDS) of `count` points."""
+    rng = np.random.default_rng(seed)
+    n_landmarks = min(count, _LANDMARKS)
+    n_semi = count - n_landmarks
+    semi = np.arange(n_semi)
+    curve_id = np.concatenate([np.zeros(n_landmarks, dtype=np.int32), (semi // _CURVE_POINTS + 1).astype(np.int32)])
+    curve_index = np.concatenate([np.zeros(n_landmarks, dtype=np.int32), (semi % _CURVE_POINTS).astype(np.int32)])
+    kind = np.concatenate([
+        np.full(n_landmarks, pts_format.KIND_LANDMARK, dtype=np.int32),
+        np.full(n_semi, pts_format.KIND_SEMI, dtype=np.int32),
+    ])
+    names = [f"S.{i + 1}" for i in range(n_landmarks)]
+    names += [f"C.{c}.{i}" for c, i in zip(curve_id[n_landmarks:].tolist(), curve_index[n_landmarks:].tolist())]
+    return {
+        "name": names,
+        "co": rng.normal(scale=50.0, size=(count, 3)),
+        "kind": kind,
+        "curve_id": curve_id,
+        "curve_index": curve_index,
+    }
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument("--points", default="1k,10k,100k,1M", help="Point counts (default: 1k,10k,100k,1M)")
+    parser.add_argument("--skip-dicts", action="store_true",
+                        help="Skip the per-row parse_pts/write_pts cases (slow for 1M points)")
+    args = parser.parse_args(script_args())
+
+    extensions = [".pts", ".pts.gz"] + ([".pts.zst"] if pts_format.HAS_ZSTD else [])
+    results = []
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        for count in parse_sizes(args.points):
+            arrays = synthetic_arrays(count)
+            for ext in extensions:
+                path = os.path.join(workdir, f"bench_{count}{ext}")
+                label = ext.lstrip(".")
+                first = len(results)
+                results.append(measure(f"write_pts_arrays[{label}]", count,
+                                       lambda _state: pts_format.write_pts_arrays(path, arrays), repeat=args.repeat))
+                results.append(measure(f"parse_pts_arrays[{label}]", count,
+                                       lambda _state: pts_format.parse_pts_arrays(path), repeat=args.repeat))
+                if not args.skip_dicts:
+                    points = pts_format.parse_pts(path)
+                    results.append(measure(f"write_pts[{label}]", count,
+                                           lambda _state: pts_format.write_pts(path, points), repeat=args.repeat))
+                    results.append(measure(f"parse_pts[{label}]", count,
+                                           lambda _state: pts_format.parse_pts(path), repeat=args.repeat))
+                    points = None
+                file_bytes = os.path.getsize(path)
+                for result in results[first:]:
+                    result["file_bytes"] = file_bytes
+
+    write_results(args.out, "pts", results, zstd=pts_format.HAS_ZSTD)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Compare two benchmark result files (from bench_pts.py or bench_blender.py):
+
+    python benchmarks/compare.py baseline.json current.json --threshold 1.10
+
+Prints the median time ratio (current / baseline) of every case found in
+both, and exits with status 1 when any case got slower than the threshold.
+"""
+
+import argparse
+import json
+import sys
+
+
+def _cases(path):
+    with open(path) as f:
+        data = json.load(f)
+    return {(result["name"], result["size"]): result for result in data["results"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=1.10,
+                        help="Slowdown ratio reported as a regression (default: 1.10)")
+    args = parser.parse_args()
+
+    baseline, current = _cases(args.baseline), _cases(args.current)
+    regressions = 0
+    print(f"{'case':<32} {'size':>10} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}")
+    for key in sorted(baseline.keys() & current.keys()):
+        before, after = baseline[key]["median_s"], current[key]["median_s"]
+        ratio = after / before if before > 0 else float("inf")
+        flag = ""
+        if ratio > args.threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{key[0]:<32} {key[1]:>10} {before * 1e3:12.3f} {after * 1e3:12.3f} {ratio:7.2f}{flag}")
+
+    missing = sorted(baseline.keys() ^ current.keys())
+    if missing:
+        print(f"{len(missing)} case(s) only present in one of the files")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
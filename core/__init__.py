@@ -8,14 +8,18 @@ Landmarks and semilandmarks are stored as plain points on a lightweight
 (see overlay.py) -- no mesh geometry is ever created for them.
 """
 
+from . import raycast
+from . import registry
 from . import landmark_data
 from . import overlay
 from . import landmark_ops
 from . import file_io
 from . import pts_io
+from . import bmk_io
+from . import morpho_io
 from . import panel
 
-_modules = (landmark_data, overlay, landmark_ops, file_io, pts_io, panel)
+_modules = (raycast, registry, landmark_data, overlay, landmark_ops, file_io, pts_io, bmk_io, morpho_io, panel)
 
 
 def register():
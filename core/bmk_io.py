@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Compact binary landmark files (.bmk), a sidecar to the text .pts format for
+large studies where re-parsing text every session is the bottleneck.
+
+Layout, little-endian, every section starting on an 8-byte boundary:
+
+    header      magic b"BMRK", uint16 version, uint16 reserved,
+                uint64 point count N, uint64 name table size S   (24 bytes, padded to 32)
+    co          float64 (N, 3) world-space positions
+    ints        int32   (N, 3) kind, curve id, curve index per point
+    names       S bytes: UTF-8 point names, NUL separated
+
+The numeric sections are copied out of a memory map in one block each,
+without parsing, and the map is closed again right away (a mapped file
+cannot be overwritten on Windows). Rows keep the order they were written
+in, and .bmk -> .pts writes coordinates with full float64 precision, so
+conversions are lossless in both directions.
+"""
+
+import mmap
+import os
+import struct
+
+import bpy
+import numpy as np
+from bpy.props import StringProperty
+from bpy.types import Operator
+from bpy_extras.io_utils import ExportHelper, ImportHelper
+
+from .landmark_data import KIND_LANDMARK, add_points, read_points
+from .pts_format import parse_pts_arrays, write_pts_arrays
+from .utils import create_landmark_set, get_active_landmark_set
+
+BMK_MAGIC = b"BMRK"
+BMK_VERSION = 1
+_HEADER = struct.Struct("<4sHHQQ")
+_HEADER_SIZE = 32
+
+
+class BmkFormatError(Exception):
+    pass
+
+
+def _aligned(offset):
+    return (offset + 7) & ~7
+
+
+def _layout(count):
+    """Byte offsets of the co, ints and names sections for `count` points."""
+    co_offset = _HEADER_SIZE
+    ints_offset = co_offset + count * 3 * 8
+    names_offset = _aligned(ints_offset + count * 3 * 4)
+    return co_offset, ints_offset, names_offset
+
+
+def write_bmk(filepath, arrays):
+    """Write point arrays (see landmark_data.POINT_FIELDS) to a .bmk file, in the given order."""
+    count = len(arrays["name"])
+    names = "\0".join(arrays["name"]).encode("utf-8")
+    co = np.ascontiguousarray(arrays["co"], dtype="<f8").reshape(count, 3)
+    ints = np.empty((count, 3), dtype="<i4")
+    ints[:, 0] = arrays["kind"]
+    ints[:, 1] = arrays["curve_id"]
+    ints[:, 2] = arrays["curve_index"]
+
+    co_offset, ints_offset, names_offset = _layout(count)
+    with open(filepath, 'wb') as f:
+        f.write(_HEADER.pack(BMK_MAGIC, BMK_VERSION, 0, count, len(names)).ljust(_HEADER_SIZE, b"\0"))
+        f.write(co.tobytes())
+        f.write(ints.tobytes())
+        f.write(b"\0" * (names_offset - ints_offset - ints.nbytes))
+        f.write(names)
+
+
+def read_bmk(filepath):
+    """
+    Memory-map a .bmk file and return its point arrays. "co" and the integer
+    columns are copied out of the mapping in one block each, and the map is
+    closed before returning, so the file is free to be overwritten.
+    """
+    if os.path.getsize(filepath) < _HEADER_SIZE:
+        raise BmkFormatError("File is too short to be a .bmk file")
+    with open(filepath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        magic, version, _reserved, count, names_size = _HEADER.unpack_from(data, 0)
+        if magic != BMK_MAGIC:
+            raise BmkFormatError("Not a BlendMark .bmk file")
+        if version != BMK_VERSION:
+            raise BmkFormatError(f"Unsupported .bmk version {version}")
+
+        co_offset, ints_offset, names_offset = _layout(count)
+        if len(data) < names_offset + names_size:
+            raise BmkFormatError(f"File is truncated: {count} points need {names_offset + names_size} bytes")
+
+        # Copies: no view may outlive the map, or closing it fails.
+        co = np.frombuffer(data, dtype="<f8", count=count * 3, offset=co_offset).reshape(count, 3).copy()
+        ints = np.frombuffer(data, dtype="<i4", count=count * 3, offset=ints_offset).reshape(count, 3).copy()
+        names = data[names_offset:names_offset + names_size].decode("utf-8").split("\0") if count else []
+    if len(names) != count:
+        raise BmkFormatError(f"Name table holds {len(names)} names for {count} points")
+
+    return {
+        "name": names,
+        "co": co,
+        "kind": ints[:, 0],
+        "curve_id": ints[:, 1],
+        "curve_index": ints[:, 2],
+    }
+
+
+def pts_to_bmk(pts_path, bmk_path):
+    """Convert a .pts file to .bmk, keeping its row order."""
+    write_bmk(bmk_path, parse_pts_arrays(pts_path))
+
+
+def bmk_to_pts(bmk_path, pts_path):
+    """Convert a .bmk file to .pts, keeping its row order and every bit of its coordinates."""
+    write_pts_arrays(pts_path, read_bmk(bmk_path), sort=False, float_format="%r")
+
+
+class VIEW3D_OT_BlendMark_ImportBMKOperator(Operator, ImportHelper):
+    bl_idname = "view3d.blendmark_import_bmk"
+    bl_label = "Import .bmk"
+    bl_options = {'REGISTER', 'UNDO'}
+    bl_description = "Import a binary BlendMark landmark file as a viewport overlay (no mesh is created)"
+
+    filename_ext = ".bmk"
+    filter_glob: StringProperty(default="*.bmk", options={'HIDDEN'})
+
+    def execute(self, context):
+        try:
+            arrays = read_bmk(self.filepath)
+        except (BmkFormatError, OSError, UnicodeDecodeError) as exc:
+            self.report({'ERROR'}, f"Could not import '{self.filepath}': {exc}")
+            return {'CANCELLED'}
+
+        target = context.scene.blendmark_target_object
+        name = os.path.splitext(os.path.basename(self.filepath))[0]
+        landmark_set = create_landmark_set(context, name, target_object=target)
+        add_points(landmark_set, arrays)
+
+        context.view_layer.objects.active = landmark_set
+        for obj in context.selected_objects:
+            obj.select_set(False)
+        landmark_set.select_set(True)
+
+        n_landmarks = int(np.count_nonzero(arrays["kind"] == KIND_LANDMARK))
+        n_semi = len(arrays["name"]) - n_landmarks
+        self.report({'INFO'}, f"Imported {n_landmarks} landmarks and {n_semi} semilandmarks into '{landmark_set.name}'")
+        return {'FINISHED'}
+
+
+class VIEW3D_OT_BlendMark_ExportBMKOperator(Operator, ExportHelper):
+    bl_idname = "view3d.blendmark_export_bmk"
+    bl_label = "Export .bmk"
+    bl_options = {'REGISTER', 'UNDO'}
+    bl_description = "Export the active landmark set to a binary BlendMark landmark file"
+
+    filename_ext = ".bmk"
+    filter_glob: StringProperty(default="*.bmk", options={'HIDDEN'})
+
+    def invoke(self, context, event):
+        landmark_set = get_active_landmark_set(context)
+        if landmark_set is None:
+            self.report({'ERROR'}, "Active object is not a BlendMark landmark set")
+            return {'CANCELLED'}
+        self.filepath = f"{landmark_set.name}.bmk"
+        return super().invoke(context, event)
+
+    def execute(self, context):
+        landmark_set = get_active_landmark_set(context)
+        if landmark_set is None:
+            self.report({'ERROR'}, "Active object is not a BlendMark landmark set")
+            return {'CANCELLED'}
+        if len(landmark_set.blendmark_points) == 0:
+            self.report({'WARNING'}, "Landmark set is empty, nothing to export")
+            return {'CANCELLED'}
+
+        write_bmk(self.filepath, read_points(landmark_set))
+        self.report({'INFO'}, f"Exported {len(landmark_set.blendmark_points)} points to '{self.filepath}'")
+        return {'FINISHED'}
+
+
+classes = (
+    VIEW3D_OT_BlendMark_ImportBMKOperator,
+    VIEW3D_OT_BlendMark_ExportBMKOperator,
+)
+
+
+def register():
+    for cls in classes:
+        bpy.utils.register_class(cls)
+
+
+def unregister():
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
@@ -7,13 +7,35 @@ Folder/reference-file handling and CSV export for BlendMark.
 import os
 
 import bpy
+import numpy as np
 from bpy.props import CollectionProperty, StringProperty
 from bpy.types import Operator
 from bpy_extras.io_utils import ImportHelper
 
+from .landmark_data import read_points
 from .utils import get_active_landmark_set
 
 
+# Rows formatted per write by write_csv.
+_CHUNK_ROWS = 65536
+
+
+def write_csv(filepath, arrays):
+    """Write point arrays (name and co, see landmark_data.POINT_FIELDS) as 'Landmark, X, Y, Z' CSV rows."""
+    names = arrays["name"]
+    co = np.asarray(arrays["co"], dtype=np.float64).reshape(-1, 3)
+    with open(filepath, 'w') as f:
+        f.write("Landmark, X, Y, Z\n")
+        for start in range(0, len(names), _CHUNK_ROWS):
+            block = co[start:start + _CHUNK_ROWS]
+            values = [None] * (len(block) * 4)
+            values[0::4] = names[start:start + _CHUNK_ROWS]
+            values[1::4] = block[:, 0].tolist()
+            values[2::4] = block[:, 1].tolist()
+            values[3::4] = block[:, 2].tolist()
+            f.write(("%s, %s, %s, %s\n" * len(block)) % tuple(values))
+
+
 class VIEW3D_OT_BlendMark_BrowseFolderOperator(Operator, ImportHelper):
     bl_idname = "view3d.blendmark_browse_folder"
     bl_label = "Browse Folder"
@@ -103,10 +125,7 @@ class VIEW3D_OT_BlendMark_ExportCSVOperator(Operator):
             return {'CANCELLED'}
 
         csv_filename = os.path.join(selected_folder, f"{landmark_set.name}.csv")
-        with open(csv_filename, 'w') as f:
-            f.write("Landmark, X, Y, Z\n")
-            for p in landmark_set.blendmark_points:
-                f.write(f"{p.point_name}, {p.co.x}, {p.co.y}, {p.co.z}\n")
+        write_csv(csv_filename, read_points(landmark_set, fields=("name", "co")))
 
         self.report({'INFO'}, f"Landmarks exported to: {csv_filename}")
         return {'FINISHED'}
@@ -5,21 +5,42 @@ Data model for BlendMark: landmarks and semilandmarks are stored as plain
 points (name + world-space XYZ) in a CollectionProperty on a lightweight
 "landmark set" object, instead of real mesh geometry. This is what lets the
 add-on show them purely as a viewport overlay (see core/overlay.py).
+
+Anything that adds, moves or removes points must call tag_points_changed() on
+the set afterwards (the bulk write_points()/add_points() do it themselves):
+consumers such as the overlay cache derived data per set and only rebuild it
+when the set's version changes. Code that only moves points can pass
+names_changed=False to keep the set's naming index.
 """
 
+import hashlib
+
 import bpy
+import numpy as np
+from bpy.app.handlers import persistent
 from bpy.types import Operator, PropertyGroup
 from bpy.props import (
     StringProperty, FloatVectorProperty, EnumProperty, IntProperty, PointerProperty,
 )
 
+from . import registry
 from .utils import (
     create_landmark_set, get_active_landmark_set, is_landmark_set, is_valid_target,
 )
 
 
+# Integer values of BlendMarkPoint.kind, as returned by foreach_get().
+KIND_LANDMARK = 0
+KIND_SEMI = 1
+
+
+def _naming_fields_changed(point, _context):
+    # A point renamed, or moved to another curve or kind, from the UI or a script.
+    _naming.pop(point.id_data.session_uid, None)
+
+
 class BlendMarkPoint(PropertyGroup):
-    point_name: StringProperty(name="Name", default="S.1")
+    point_name: StringProperty(name="Name", default="S.1", update=_naming_fields_changed)
     co: FloatVectorProperty(name="Position", size=3, subtype='XYZ')
     kind: EnumProperty(
         name="Kind",
@@ -28,11 +49,331 @@ class BlendMarkPoint(PropertyGroup):
             ('SEMI', "Semilandmark", "Point sampled along a curve"),
         ],
         default='LANDMARK',
+        update=_naming_fields_changed,
     )
-    curve_id: IntProperty(name="Curve ID", default=0)
+    curve_id: IntProperty(name="Curve ID", default=0, update=_naming_fields_changed)
     curve_index: IntProperty(name="Curve Index", default=0)
 
 
+# ---------------------------------------------------------------------------
+# Bulk access
+# ---------------------------------------------------------------------------
+
+# Keys of the "point arrays" dicts exchanged by read_points()/write_points():
+#   name        list of str
+#   co          (N, 3) float32 world-space positions
+#   kind        (N,) int32, KIND_LANDMARK or KIND_SEMI
+#   curve_id    (N,) int32
+#   curve_index (N,) int32
+POINT_FIELDS = ("name", "co", "kind", "curve_id", "curve_index")
+_INT_FIELDS = ("kind", "curve_id", "curve_index")
+
+
+def point_coords(landmark_set):
+    """World-space positions of every point of the set as an (N, 3) float32 array."""
+    points = landmark_set.blendmark_points
+    co = np.empty(len(points) * 3, dtype=np.float32)
+    points.foreach_get("co", co)
+    return co.reshape(-1, 3)
+
+
+def read_points(landmark_set, fields=POINT_FIELDS):
+    """
+    Read whole columns of a landmark set at once with foreach_get, as a dict
+    of point arrays (see POINT_FIELDS). Only names need a Python loop, so
+    leave "name" out of `fields` when it is not needed.
+    """
+    points = landmark_set.blendmark_points
+    arrays = {}
+    for field in fields:
+        if field == "name":
+            arrays["name"] = [p.point_name for p in points]
+        elif field == "co":
+            arrays["co"] = point_coords(landmark_set)
+        else:
+            values = np.empty(len(points), dtype=np.int32)
+            points.foreach_get(field, values)
+            arrays[field] = values
+    return arrays
+
+
+def write_points(landmark_set, arrays):
+    """
+    Replace every point of the set with the given point arrays (all of
+    POINT_FIELDS are required), resizing the collection only at its end.
+    """
+    _write_columns(landmark_set, arrays)
+    _store_naming(landmark_set, _name_maxima(arrays))
+
+
+def _write_columns(landmark_set, arrays, names_from=0):
+    # Names before `names_from` are known to be unchanged and are not rewritten.
+    points = landmark_set.blendmark_points
+    count = len(arrays["name"])
+    while len(points) > count:
+        points.remove(len(points) - 1)
+    for _ in range(count - len(points)):
+        points.add()
+
+    if count:
+        points.foreach_set("co", np.ascontiguousarray(arrays["co"], dtype=np.float32).reshape(-1))
+        for field in _INT_FIELDS:
+            points.foreach_set(field, np.ascontiguousarray(arrays[field], dtype=np.int32))
+        for point, name in zip(points[names_from:], arrays["name"][names_from:]):
+            point.point_name = name
+    tag_points_changed(landmark_set)
+
+
+def filter_points(landmark_set, keep):
+    """
+    Keep only the points selected by `keep` and drop the rest, rewriting the
+    collection in one pass instead of shifting it with one remove() per point.
+
+    `keep` is a boolean mask over the set's points, or a callable taking the
+    set's point arrays (see read_points) and returning one, e.g.
+    ``lambda a: a["kind"] == KIND_LANDMARK`` to drop every semilandmark. The
+    active index follows its point, or the next surviving one. Returns the
+    number of removed points.
+    """
+    arrays = read_points(landmark_set)
+    mask = np.asarray(keep(arrays) if callable(keep) else keep, dtype=bool).reshape(-1)
+    count = len(arrays["name"])
+    if len(mask) != count:
+        raise ValueError(f"Mask has {len(mask)} entries, the set has {count} points")
+    removed = count - int(np.count_nonzero(mask))
+    if removed == 0:
+        return 0
+
+    kept = {field: arrays[field][mask] for field in POINT_FIELDS if field != "name"}
+    kept["name"] = [name for name, flag in zip(arrays["name"], mask) if flag]
+    _write_columns(landmark_set, kept, names_from=int(np.argmin(mask)))
+    _store_naming(landmark_set, _name_maxima(kept))
+
+    active = landmark_set.blendmark_active_index
+    if 0 <= active < count:
+        new_active = int(np.count_nonzero(mask[:active]))
+        landmark_set.blendmark_active_index = min(new_active, len(kept["name"]) - 1)
+    return removed
+
+
+def remove_curves(landmark_set, curve_ids):
+    """Delete every semilandmark of the given curves. Returns the number of removed points."""
+    curve_ids = np.asarray(list(curve_ids), dtype=np.int32)
+    return filter_points(
+        landmark_set,
+        lambda a: ~((a["kind"] == KIND_SEMI) & np.isin(a["curve_id"], curve_ids)),
+    )
+
+
+def add_points(landmark_set, arrays):
+    """
+    Append the given point arrays (all of POINT_FIELDS) to the set in one pass:
+    the collection is grown up front and every numeric field of the whole
+    collection is then filled with a single foreach_set.
+    """
+    new_count = len(arrays["name"])
+    if new_count == 0:
+        return
+    naming = _valid_naming(landmark_set)
+    points = landmark_set.blendmark_points
+    start = len(points)
+    existing = read_points(landmark_set, fields=("co",) + _INT_FIELDS)
+    for _ in range(new_count):
+        points.add()
+
+    co = np.concatenate((existing["co"], np.asarray(arrays["co"], dtype=np.float32).reshape(-1, 3)))
+    points.foreach_set("co", co.reshape(-1))
+    for field in _INT_FIELDS:
+        values = np.concatenate((existing[field], np.asarray(arrays[field], dtype=np.int32).reshape(-1)))
+        points.foreach_set(field, values)
+    for point, name in zip(points[start:], arrays["name"]):
+        point.point_name = name
+    tag_points_changed(landmark_set)
+    if naming is not None:
+        added = _name_maxima(arrays)
+        _store_naming(landmark_set, {
+            key: _max_or_none(naming[key], added[key]) for key in ("last_landmark", "last_curve")
+        })
+
+
+def add_landmark(landmark_set, name, co):
+    """Append a single fixed landmark and return its index."""
+    naming = _valid_naming(landmark_set)
+    point = landmark_set.blendmark_points.add()
+    point.point_name = name
+    point.co = co
+    point.kind = 'LANDMARK'
+    tag_points_changed(landmark_set)
+    if naming is not None:
+        _store_naming(landmark_set, {
+            "last_landmark": _max_or_none(naming["last_landmark"], _landmark_number(name)),
+            "last_curve": naming["last_curve"],
+        })
+    return len(landmark_set.blendmark_points) - 1
+
+
+def remove_point(landmark_set, index):
+    """Remove the point at `index`."""
+    naming = _valid_naming(landmark_set)
+    points = landmark_set.blendmark_points
+    point = points[index]
+    number = _landmark_number(point.point_name) if point.kind == 'LANDMARK' else None
+    curve_id = point.curve_id if point.kind == 'SEMI' else None
+    points.remove(index)
+    tag_points_changed(landmark_set)
+    # Still valid unless the removed point held one of the maxima; otherwise
+    # the index is rebuilt the next time a name is needed.
+    if naming is not None and number != naming["last_landmark"] and curve_id != naming["last_curve"]:
+        _store_naming(landmark_set, naming)
+
+
+def points_hash(arrays):
+    """Content hash of point arrays (all of POINT_FIELDS), as a hex string."""
+    digest = hashlib.sha1()
+    digest.update(np.ascontiguousarray(arrays["co"], dtype=np.float32).tobytes())
+    for field in _INT_FIELDS:
+        digest.update(np.ascontiguousarray(arrays[field], dtype=np.int32).tobytes())
+    digest.update("\n".join(arrays["name"]).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def curve_point_arrays(curve_id, coords):
+    """Point arrays for semilandmarks C.<curve_id>.01, .02, ... at `coords`, in order."""
+    count = len(coords)
+    return {
+        "name": [f"C.{curve_id}.{i:02d}" for i in range(1, count + 1)],
+        "co": np.asarray(coords, dtype=np.float32).reshape(-1, 3),
+        "kind": np.full(count, KIND_SEMI, dtype=np.int32),
+        "curve_id": np.full(count, curve_id, dtype=np.int32),
+        "curve_index": np.arange(1, count + 1, dtype=np.int32),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Point naming
+# ---------------------------------------------------------------------------
+
+# session_uid -> naming index of a set: the highest "S.<n>" landmark number
+# and the highest curve id (None when there is none), together with the point
+# count they were computed for. Bulk writes keep it up to date. Renames and
+# curve/kind edits (see _naming_fields_changed), tag_points_changed() unless
+# told only positions changed, and undo/redo/load drop it, as does a point
+# count that no longer matches; it is then rebuilt on the next lookup.
+_naming = {}
+
+
+def _landmark_number(name):
+    """n for a landmark named 'S.<n>', else None."""
+    if not name.startswith("S."):
+        return None
+    try:
+        return int(name.split(".")[1])
+    except (ValueError, IndexError):
+        return None
+
+
+def _max_or_none(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return max(a, b)
+
+
+def _name_maxima(arrays):
+    numbers = [
+        number for number in (
+            _landmark_number(name)
+            for name, kind in zip(arrays["name"], arrays["kind"]) if kind == KIND_LANDMARK
+        )
+        if number is not None
+    ]
+    curve_ids = np.asarray(arrays["curve_id"])[np.asarray(arrays["kind"]) == KIND_SEMI]
+    return {
+        "last_landmark": max(numbers) if numbers else None,
+        "last_curve": int(curve_ids.max()) if len(curve_ids) else None,
+    }
+
+
+def _store_naming(landmark_set, maxima):
+    _naming[landmark_set.session_uid] = {
+        "last_landmark": maxima["last_landmark"],
+        "last_curve": maxima["last_curve"],
+        "count": len(landmark_set.blendmark_points),
+    }
+
+
+def _valid_naming(landmark_set):
+    """The set's naming index if it still matches the stored points, else None."""
+    entry = _naming.get(landmark_set.session_uid)
+    if entry is None or entry["count"] != len(landmark_set.blendmark_points):
+        return None
+    return entry
+
+
+def _naming_index(landmark_set):
+    entry = _valid_naming(landmark_set)
+    if entry is None:
+        _store_naming(landmark_set, _name_maxima(read_points(landmark_set, fields=("name", "kind", "curve_id"))))
+        entry = _naming[landmark_set.session_uid]
+    return entry
+
+
+def next_landmark_name(landmark_set):
+    last = _naming_index(landmark_set)["last_landmark"]
+    return f"S.{(last + 1) if last is not None else 1}"
+
+
+def next_curve_id(landmark_set):
+    last = _naming_index(landmark_set)["last_curve"]
+    return (last + 1) if last is not None else 1
+
+
+# ---------------------------------------------------------------------------
+# Change tracking
+# ---------------------------------------------------------------------------
+
+# Every change hands out a fresh number, so a version is never reused. Sets
+# that were never tagged report _base_version, which is bumped whenever
+# undo/redo/file load may have swapped the stored points behind our back.
+_version_counter = 0
+_base_version = 0
+_versions = {}
+
+
+def tag_points_changed(landmark_set, names_changed=True):
+    """
+    Record that points of `landmark_set` were added, moved or removed. Pass
+    names_changed=False when only positions changed, to keep the naming index.
+    """
+    global _version_counter
+    _version_counter += 1
+    _versions[landmark_set.session_uid] = _version_counter
+    if names_changed:
+        _naming.pop(landmark_set.session_uid, None)
+
+
+def points_version(landmark_set):
+    """Opaque number that changes every time tag_points_changed() is called on the set."""
+    return _versions.get(landmark_set.session_uid, _base_version)
+
+
+@persistent
+def _invalidate_versions(*_args):
+    global _version_counter, _base_version
+    _version_counter += 1
+    _base_version = _version_counter
+    _versions.clear()
+    _naming.clear()
+
+
+_version_handlers = (
+    bpy.app.handlers.undo_post,
+    bpy.app.handlers.redo_post,
+    bpy.app.handlers.load_post,
+)
+
+
 class VIEW3D_OT_BlendMark_NewLandmarkSetOperator(Operator):
     bl_idname = "view3d.blendmark_new_landmark_set"
     bl_label = "New Landmark Set"
@@ -89,7 +430,7 @@ class VIEW3D_OT_BlendMark_DeletePointOperator(Operator):
             return {'CANCELLED'}
 
         name = points[index].point_name
-        points.remove(index)
+        remove_point(landmark_set, index)
         landmark_set.blendmark_active_index = min(index, len(points) - 1)
         self.report({'INFO'}, f"Deleted '{name}'")
         return {'FINISHED'}
@@ -114,12 +455,8 @@ class VIEW3D_OT_BlendMark_DeleteCurveOperator(Operator):
             return {'CANCELLED'}
 
         curve_id = points[index].curve_id
-        to_remove = [i for i, p in enumerate(points) if p.kind == 'SEMI' and p.curve_id == curve_id]
-        for i in reversed(to_remove):
-            points.remove(i)
-
-        landmark_set.blendmark_active_index = min(landmark_set.blendmark_active_index, len(points) - 1)
-        self.report({'INFO'}, f"Deleted curve {curve_id} ({len(to_remove)} points)")
+        removed = remove_curves(landmark_set, [curve_id])
+        self.report({'INFO'}, f"Deleted curve {curve_id} ({removed} points)")
         return {'FINISHED'}
 
 
@@ -135,9 +472,15 @@ def _target_poll(self, obj):
     return is_valid_target(obj)
 
 
+def _target_update(self, context):
+    registry.target_changed(self)
+
+
 def register():
     for cls in classes:
         bpy.utils.register_class(cls)
+    for handlers in _version_handlers:
+        handlers.append(_invalidate_versions)
 
     bpy.types.Object.blendmark_points = bpy.props.CollectionProperty(type=BlendMarkPoint)
     bpy.types.Object.blendmark_active_index = IntProperty(name="Active Point Index", default=0)
@@ -146,6 +489,7 @@ def register():
         description="Mesh or reference image these landmarks are placed on",
         type=bpy.types.Object,
         poll=_target_poll,
+        update=_target_update,
     )
     bpy.types.Scene.blendmark_target_object = PointerProperty(
         name="Target Object",
@@ -161,5 +505,8 @@ def unregister():
     del bpy.types.Object.blendmark_active_index
     del bpy.types.Object.blendmark_points
 
+    for handlers in _version_handlers:
+        if _invalidate_versions in handlers:
+            handlers.remove(_invalidate_versions)
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
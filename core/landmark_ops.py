@@ -7,21 +7,28 @@ Interactive tools for BlendMark:
 * a modal operator to draw a stroke over the target surface and turn it into
   equally-spaced semilandmarks,
 * an operator that builds the same semilandmarks from an edge path selected in
-  Edit Mode, when following the real mesh topology matters.
+  Edit Mode, when following the real mesh topology matters,
+* an operator that resamples every existing curve to a new point count.
 """
 
+import time
+
 import bmesh
 import bpy
+import numpy as np
 from bpy.props import IntProperty
 from bpy.types import Operator
-from bpy_extras.view3d_utils import location_3d_to_region_2d
 
 from mathutils import Vector
 
-from . import overlay
+from . import overlay, registry
+from .landmark_data import (
+    KIND_SEMI, POINT_FIELDS, add_landmark, add_points, curve_point_arrays, next_curve_id, next_landmark_name,
+    point_coords, points_version, read_points, remove_curves, remove_point, tag_points_changed,
+)
 from .utils import (
-    get_active_landmark_set, is_landmark_set, next_curve_id, next_landmark_name,
-    order_selected_edge_path, pick_target_point, resample_polyline,
+    ScreenPointGrid, get_active_landmark_set, order_selected_edge_path, pick_target_point,
+    project_points, resample_polyline, resample_polylines, snap_to_target, view_key,
 )
 
 PICK_TOLERANCE_PX = 14
@@ -42,8 +49,15 @@ def request_stop():
 class _ModalToolMixin:
     """
     Shared plumbing for BlendMark's modal viewport tools: locating the 3D
-    viewport region, hit-testing the pointer against it, and tearing down
-    cleanly.
+    viewport region, hit-testing the pointer against it, scheduling redraws
+    and tearing down cleanly.
+
+    Redraw requests only set a dirty flag. The viewport is tagged at most once
+    per frame budget (scene.blendmark_redraw_rate); requests in between are
+    coalesced and flushed by a frame timer, which only runs while something
+    is queued; otherwise the tool only wakes up every 0.2 s to poll for Finish.
+    Work that only matters for what is shown (e.g. the ray cast of a drag)
+    can be deferred to the same flush through _process_pending().
     """
 
     def _init_tool(self, context, status_text, hint):
@@ -75,13 +89,24 @@ class _ModalToolMixin:
         self.area = context.area
         self.region = region
         self.rv3d = context.space_data.region_3d
+        # Face budget of the decimated target used for live previews, 0 = off.
+        scene = context.scene
+        self.proxy_faces = scene.blendmark_proxy_faces if scene.blendmark_interactive_proxy else 0
+        self._frame_budget = 1.0 / scene.blendmark_redraw_rate
+        self._last_frame = 0.0
+        self._redraw_pending = False
+        self._frame_timer = None
+        self._window_manager = context.window_manager
+        self._window = context.window
 
         _stop_requested = False
         overlay.set_tool_state(active=True, set_name=landmark_set.name,
                                target_name=target.name, region=region,
-                               hover_index=-1, stroke=[], hint=hint)
+                               hover_index=-1, hint=hint)
+        overlay.STROKE_BUFFER.clear()
 
         context.workspace.status_text_set(status_text)
+        # Polls _stop_requested; a faster frame timer only runs while work is queued.
         self._timer = context.window_manager.event_timer_add(0.2, window=context.window)
         context.window_manager.modal_handler_add(self)
         return True
@@ -115,11 +140,43 @@ class _ModalToolMixin:
         )
         return inside, (x, y)
 
-    def _redraw(self):
-        try:
-            self.area.tag_redraw()
-        except (AttributeError, ReferenceError):
-            pass
+    def _redraw(self, now=False):
+        """Request a viewport redraw: right away with `now`, else within the frame budget."""
+        self._redraw_pending = True
+        self._flush_frame(force=now)
+
+    def _has_pending(self):
+        """Whether the tool queued work for _process_pending()."""
+        return False
+
+    def _process_pending(self):
+        """Deferred per-frame work of a tool, run by _flush_frame() before redrawing."""
+
+    def _set_frame_timer(self, running):
+        if running and self._frame_timer is None:
+            self._frame_timer = self._window_manager.event_timer_add(self._frame_budget, window=self._window)
+        elif not running and self._frame_timer is not None:
+            self._window_manager.event_timer_remove(self._frame_timer)
+            self._frame_timer = None
+
+    def _flush_frame(self, force=False):
+        if not self._redraw_pending and not self._has_pending():
+            self._set_frame_timer(False)
+            return
+        current = time.monotonic()
+        if not force and current - self._last_frame < self._frame_budget:
+            # Too early: the frame timer flushes it once the budget is up.
+            self._set_frame_timer(True)
+            return
+        self._process_pending()
+        if self._redraw_pending:
+            self._redraw_pending = False
+            self._last_frame = current
+            try:
+                self.area.tag_redraw()
+            except (AttributeError, ReferenceError):
+                pass
+        self._set_frame_timer(self._has_pending())
 
     def _area_is_alive(self, context):
         try:
@@ -128,11 +185,13 @@ class _ModalToolMixin:
             return False
 
     def _finish(self, context):
-        context.window_manager.event_timer_remove(self._timer)
         context.workspace.status_text_set(None)
         overlay.set_tool_state(active=False, hover_index=-1, set_name="",
-                               target_name="", region=None, stroke=[], hint="")
-        self._redraw()
+                               target_name="", region=None, hint="")
+        overlay.STROKE_BUFFER.clear()
+        self._redraw(now=True)
+        context.window_manager.event_timer_remove(self._timer)
+        self._set_frame_timer(False)
         return {'FINISHED'}
 
     def cancel(self, context):
@@ -155,23 +214,32 @@ class VIEW3D_OT_BlendMark_EditPointsOperator(_ModalToolMixin, Operator):
 
     def invoke(self, context, event):
         self.drag_index = None
+        # Latest pointer position of a drag, ray cast once per frame.
+        self._pending_drag = None
         self.hover_index = -1
+        self._grid = None
+        self._grid_key = None
         status = "LMB: add / drag point   |   X: delete hovered point   |   Esc, Enter or RMB: finish"
         if not self._init_tool(context, status, "LMB add/drag  ·  X delete"):
             return {'CANCELLED'}
         return {'RUNNING_MODAL'}
 
+    def _pick_grid(self):
+        """Screen-space grid of the set's points, rebuilt only when the view or the points change."""
+        key = (
+            view_key(self.region, self.rv3d),
+            points_version(self.landmark_set), len(self.landmark_set.blendmark_points),
+        )
+        if self._grid is None or key != self._grid_key:
+            screen, visible = project_points(self.region, self.rv3d, point_coords(self.landmark_set))
+            self._grid = ScreenPointGrid(
+                screen, visible, (self.region.width, self.region.height), PICK_TOLERANCE_PX,
+            )
+            self._grid_key = key
+        return self._grid
+
     def _pick(self, coord):
-        best_index, best_dist = -1, PICK_TOLERANCE_PX
-        mouse = Vector(coord)
-        for i, point in enumerate(self.landmark_set.blendmark_points):
-            co_2d = location_3d_to_region_2d(self.region, self.rv3d, point.co)
-            if co_2d is None:
-                continue
-            dist = (co_2d - mouse).length
-            if dist < best_dist:
-                best_index, best_dist = i, dist
-        return best_index
+        return self._pick_grid().nearest(coord, PICK_TOLERANCE_PX)
 
     def _new_point_name(self, context):
         if context.scene.blendmark_use_auto_naming:
@@ -185,14 +253,57 @@ class VIEW3D_OT_BlendMark_EditPointsOperator(_ModalToolMixin, Operator):
             overlay.set_tool_state(hover_index=index)
             self._redraw()
 
+    def _has_pending(self):
+        return self._pending_drag is not None
+
+    def _process_pending(self):
+        coord, self._pending_drag = self._pending_drag, None
+        if coord is None or self.drag_index is None:
+            return
+        co = pick_target_point(self.target, self.region, self.rv3d, coord, self.proxy_faces)
+        if co is not None:
+            self.landmark_set.blendmark_points[self.drag_index].co = co
+            tag_points_changed(self.landmark_set, names_changed=False)
+            self._redraw_pending = True
+
+    def _end_drag(self, coord=None):
+        """
+        Stop dragging, committing the latest pointer position: `coord` (where
+        the button was released) or else a drag sample still waiting for its
+        frame. The point goes on the full-resolution surface under the pointer;
+        when the pointer is off the target it stays where it was, or, if it
+        was previewed on the decimated proxy, moves to the closest spot of
+        the full-resolution surface.
+        """
+        if coord is None:
+            coord = self._pending_drag
+        self._pending_drag = None
+        index, self.drag_index = self.drag_index, None
+        if index is None:
+            return
+        points = self.landmark_set.blendmark_points
+        if index >= len(points):
+            return
+        co = pick_target_point(self.target, self.region, self.rv3d, coord) if coord is not None else None
+        if co is None:
+            if not self.proxy_faces:
+                return
+            co = snap_to_target(self.target, points[index].co)
+        points[index].co = co
+        tag_points_changed(self.landmark_set, names_changed=False)
+        self._redraw(now=True)
+
     def modal(self, context, event):
         if _stop_requested or not self._area_is_alive(context):
+            self._end_drag()
             return self._finish(context)
 
         if event.type == 'TIMER':
+            self._flush_frame()
             return {'PASS_THROUGH'}
 
         if event.type in {'ESC', 'RET', 'NUMPAD_ENTER'} and event.value == 'PRESS':
+            self._end_drag()
             return self._finish(context)
 
         inside, coord = self._mouse_in_region(event)
@@ -201,18 +312,18 @@ class VIEW3D_OT_BlendMark_EditPointsOperator(_ModalToolMixin, Operator):
         # just let Blender handle the event normally.
         if not inside:
             self._set_hover(-1)
-            self.drag_index = None
+            self._end_drag()
             return {'PASS_THROUGH'}
 
         if event.type == 'RIGHTMOUSE' and event.value == 'PRESS':
+            self._end_drag(coord)
             return self._finish(context)
 
         if event.type == 'MOUSEMOVE':
             if self.drag_index is not None:
-                co = pick_target_point(self.target, self.region, self.rv3d, coord)
-                if co is not None:
-                    self.landmark_set.blendmark_points[self.drag_index].co = co
-                self._redraw()
+                # Ray cast in the next frame flush; the latest position wins.
+                self._pending_drag = coord
+                self._flush_frame()
                 return {'RUNNING_MODAL'}
             self._set_hover(self._pick(coord))
             return {'PASS_THROUGH'}
@@ -223,7 +334,7 @@ class VIEW3D_OT_BlendMark_EditPointsOperator(_ModalToolMixin, Operator):
                 if hit != -1:
                     self.drag_index = hit
                     self.landmark_set.blendmark_active_index = hit
-                    self._redraw()
+                    self._redraw(now=True)
                     return {'RUNNING_MODAL'}
 
                 co = pick_target_point(self.target, self.region, self.rv3d, coord)
@@ -233,28 +344,26 @@ class VIEW3D_OT_BlendMark_EditPointsOperator(_ModalToolMixin, Operator):
                     self.report({'WARNING'}, f"Click on '{self.target.name}' to place a landmark")
                     return {'RUNNING_MODAL'}
 
-                point = self.landmark_set.blendmark_points.add()
-                point.point_name = self._new_point_name(context)
-                point.co = co
-                point.kind = 'LANDMARK'
-                self.landmark_set.blendmark_active_index = len(self.landmark_set.blendmark_points) - 1
+                self.landmark_set.blendmark_active_index = add_landmark(
+                    self.landmark_set, self._new_point_name(context), co,
+                )
                 self.drag_index = self.landmark_set.blendmark_active_index
-                self._redraw()
+                self._redraw(now=True)
             elif event.value == 'RELEASE':
-                self.drag_index = None
+                self._end_drag(coord)
             return {'RUNNING_MODAL'}
 
         if event.type in {'X', 'DEL'} and event.value == 'PRESS':
             hit = self._pick(coord)
             if hit != -1:
-                self.landmark_set.blendmark_points.remove(hit)
+                remove_point(self.landmark_set, hit)
                 self.drag_index = None
                 self.landmark_set.blendmark_active_index = min(
                     self.landmark_set.blendmark_active_index,
                     len(self.landmark_set.blendmark_points) - 1,
                 )
                 self._set_hover(-1)
-                self._redraw()
+                self._redraw(now=True)
             return {'RUNNING_MODAL'}
 
         # Everything else (navigation, shortcuts) behaves as usual.
@@ -277,7 +386,8 @@ class VIEW3D_OT_BlendMark_DrawCurveOperator(_ModalToolMixin, Operator):
 
     def invoke(self, context, event):
         self.drawing = False
-        self.stroke = []
+        # Shared with the overlay, which draws it while it grows.
+        self.stroke = overlay.STROKE_BUFFER
         self.last_sample_2d = None
         status = "LMB drag: draw a curve on the surface   |   Esc, Enter or RMB: finish"
         if not self._init_tool(context, status, "LMB drag to draw a curve"):
@@ -290,21 +400,20 @@ class VIEW3D_OT_BlendMark_DrawCurveOperator(_ModalToolMixin, Operator):
         if self.last_sample_2d is not None and (current - self.last_sample_2d).length < MIN_SAMPLE_DIST_PX:
             return
 
-        co = pick_target_point(self.target, self.region, self.rv3d, coord)
+        co = pick_target_point(self.target, self.region, self.rv3d, coord, self.proxy_faces)
         if co is None:
             # Pointer wandered off the object; resume sampling when it returns.
             return
 
         self.stroke.append(co)
         self.last_sample_2d = current
-        overlay.set_tool_state(stroke=list(self.stroke))
         self._redraw()
 
     def _finalize_stroke(self, context):
-        stroke, self.stroke = self.stroke, []
+        stroke = self.stroke.coords().copy()
+        self.stroke.clear()
         self.last_sample_2d = None
-        overlay.set_tool_state(stroke=[])
-        self._redraw()
+        self._redraw(now=True)
 
         if len(stroke) < 2:
             self.report({'WARNING'}, f"Draw a stroke across '{self.target.name}' to create a curve")
@@ -316,15 +425,12 @@ class VIEW3D_OT_BlendMark_DrawCurveOperator(_ModalToolMixin, Operator):
         except ValueError as exc:
             self.report({'WARNING'}, str(exc))
             return
+        if self.proxy_faces:
+            # The stroke was sampled on the decimated proxy.
+            resampled = [snap_to_target(self.target, co) for co in resampled]
 
         curve_id = next_curve_id(self.landmark_set)
-        for i, co in enumerate(resampled, start=1):
-            point = self.landmark_set.blendmark_points.add()
-            point.point_name = f"C.{curve_id}.{i:02d}"
-            point.co = co
-            point.kind = 'SEMI'
-            point.curve_id = curve_id
-            point.curve_index = i
+        add_points(self.landmark_set, curve_point_arrays(curve_id, resampled))
 
         self.landmark_set.blendmark_active_index = len(self.landmark_set.blendmark_points) - 1
         self.report({'INFO'}, f"Curve {curve_id}: {num_points} semilandmarks drawn on '{self.target.name}'")
@@ -336,14 +442,14 @@ class VIEW3D_OT_BlendMark_DrawCurveOperator(_ModalToolMixin, Operator):
             return self._finish(context)
 
         if event.type == 'TIMER':
+            self._flush_frame()
             return {'PASS_THROUGH'}
 
         if event.type in {'ESC', 'RET', 'NUMPAD_ENTER'} and event.value == 'PRESS':
             if self.drawing:
                 # Abandon the half-drawn stroke rather than committing it.
                 self.drawing = False
-                self.stroke = []
-                overlay.set_tool_state(stroke=[])
+                self.stroke.clear()
             return self._finish(context)
 
         inside, coord = self._mouse_in_region(event)
@@ -361,7 +467,7 @@ class VIEW3D_OT_BlendMark_DrawCurveOperator(_ModalToolMixin, Operator):
         if event.type == 'LEFTMOUSE':
             if event.value == 'PRESS':
                 self.drawing = True
-                self.stroke = []
+                self.stroke.clear()
                 self.last_sample_2d = None
                 self._sample(coord)
             elif event.value == 'RELEASE' and self.drawing:
@@ -403,19 +509,36 @@ class VIEW3D_OT_BlendMark_GenerateSemilandmarksOperator(Operator):
         self.num_points = context.scene.blendmark_curve_points
         return self.execute(context)
 
+    def _landmark_set_for(self, context, mesh_obj):
+        """
+        The landmark set on `mesh_obj` to add the curve to: the active object
+        or else the selected set when several target it, the only one
+        otherwise. Reports why and returns None when there is no clear choice.
+        """
+        landmark_sets = registry.sets_for_target(mesh_obj)
+        if not landmark_sets:
+            self.report({'ERROR'}, f"No landmark set targets '{mesh_obj.name}'. Create one with 'New Landmark Set' first")
+            return None
+        if len(landmark_sets) == 1:
+            return landmark_sets[0]
+        if context.active_object in landmark_sets:
+            return context.active_object
+        selected = [obj for obj in landmark_sets if obj.select_get()]
+        if len(selected) == 1:
+            return selected[0]
+        names = ", ".join(sorted(f"'{obj.name}'" for obj in landmark_sets))
+        self.report({'ERROR'}, f"Several landmark sets target '{mesh_obj.name}' ({names}). "
+                               "Select the one to use (Ctrl+click it in the Outliner) and try again")
+        return None
+
     def execute(self, context):
         mesh_obj = context.edit_object
         if mesh_obj is None or mesh_obj.type != 'MESH':
             self.report({'ERROR'}, "Enter Edit Mode on the mesh and select a connected edge path")
             return {'CANCELLED'}
 
-        landmark_set = None
-        for obj in bpy.data.objects:
-            if is_landmark_set(obj) and obj.blendmark_target == mesh_obj:
-                landmark_set = obj
-                break
+        landmark_set = self._landmark_set_for(context, mesh_obj)
         if landmark_set is None:
-            self.report({'ERROR'}, f"No landmark set targets '{mesh_obj.name}'. Create one with 'New Landmark Set' first")
             return {'CANCELLED'}
 
         bm = bmesh.from_edit_mesh(mesh_obj.data)
@@ -432,23 +555,68 @@ class VIEW3D_OT_BlendMark_GenerateSemilandmarksOperator(Operator):
             return {'CANCELLED'}
 
         curve_id = next_curve_id(landmark_set)
-        for i, co in enumerate(resampled, start=1):
-            point = landmark_set.blendmark_points.add()
-            point.point_name = f"C.{curve_id}.{i:02d}"
-            point.co = co
-            point.kind = 'SEMI'
-            point.curve_id = curve_id
-            point.curve_index = i
+        add_points(landmark_set, curve_point_arrays(curve_id, resampled))
 
         self.report({'INFO'}, f"Curve {curve_id}: added {self.num_points} semilandmarks to '{landmark_set.name}'")
         return {'FINISHED'}
 
 
+class VIEW3D_OT_BlendMark_ResampleCurvesOperator(Operator):
+    bl_idname = "view3d.blendmark_resample_curves"
+    bl_label = "Resample Curves"
+    bl_options = {'REGISTER', 'UNDO'}
+    bl_description = (
+        "Resample every semilandmark curve of the active landmark set to 'Points per Curve' "
+        "equally-spaced points along its current path"
+    )
+
+    def execute(self, context):
+        landmark_set = get_active_landmark_set(context)
+        if landmark_set is None:
+            self.report({'ERROR'}, "Active object is not a BlendMark landmark set")
+            return {'CANCELLED'}
+
+        arrays = read_points(landmark_set)
+        semi = np.flatnonzero(arrays["kind"] == KIND_SEMI)
+        order = semi[np.lexsort((arrays["curve_index"][semi], arrays["curve_id"][semi]))]
+        curve_ids, first = np.unique(arrays["curve_id"][order], return_index=True)
+        polylines = np.split(arrays["co"][order].astype(np.float64), first[1:]) if len(order) else []
+
+        # Curves with a single point, or all points stacked, have no path to
+        # resample along; leave them as they are.
+        usable = [
+            k for k, co in enumerate(polylines)
+            if len(co) >= 2 and np.linalg.norm(np.diff(co, axis=0), axis=1).sum() > 0.0
+        ]
+        if not usable:
+            self.report({'WARNING'}, f"'{landmark_set.name}' has no curves to resample")
+            return {'CANCELLED'}
+
+        num_points = context.scene.blendmark_curve_points
+        resampled = resample_polylines([polylines[k] for k in usable], num_points)
+        target = landmark_set.blendmark_target
+        if target is not None and target.type == 'MESH':
+            # Points between the old ones lie on chords, not on the surface.
+            resampled = [np.array([tuple(snap_to_target(target, co)) for co in curve]) for curve in resampled]
+
+        curves = [curve_point_arrays(int(curve_ids[k]), co) for k, co in zip(usable, resampled)]
+        merged = {field: np.concatenate([c[field] for c in curves]) for field in POINT_FIELDS if field != "name"}
+        merged["name"] = [name for c in curves for name in c["name"]]
+        remove_curves(landmark_set, curve_ids[usable])
+        add_points(landmark_set, merged)
+
+        skipped = len(polylines) - len(usable)
+        skipped = f" ({skipped} degenerate curve(s) left unchanged)" if skipped else ""
+        self.report({'INFO'}, f"Resampled {len(usable)} curve(s) to {num_points} semilandmarks each{skipped}")
+        return {'FINISHED'}
+
+
 classes = (
     VIEW3D_OT_BlendMark_EditPointsOperator,
     VIEW3D_OT_BlendMark_DrawCurveOperator,
     VIEW3D_OT_BlendMark_FinishEditingOperator,
     VIEW3D_OT_BlendMark_GenerateSemilandmarksOperator,
+    VIEW3D_OT_BlendMark_ResampleCurvesOperator,
 )
 
 
@@ -463,9 +631,33 @@ def register():
         description="How many equally-spaced semilandmarks each curve is resampled to",
         default=10, min=2, max=500,
     )
+    bpy.types.Scene.blendmark_interactive_proxy = bpy.props.BoolProperty(
+        name="Interactive Proxy",
+        description=(
+            "Hover, drag and stroke previews hit a decimated copy of the target; "
+            "points are moved onto the full-resolution surface on release"
+        ),
+        default=False,
+    )
+    bpy.types.Scene.blendmark_proxy_faces = IntProperty(
+        name="Proxy Faces",
+        description="Approximate triangle count of the decimated target used for previews",
+        default=200000, min=1000,
+    )
+    bpy.types.Scene.blendmark_redraw_rate = IntProperty(
+        name="Max Redraw Rate",
+        description=(
+            "Most viewport redraws per second while a tool runs; pointer events arriving "
+            "faster are coalesced into the next frame"
+        ),
+        default=60, min=10, max=240,
+    )
 
 
 def unregister():
+    del bpy.types.Scene.blendmark_redraw_rate
+    del bpy.types.Scene.blendmark_proxy_faces
+    del bpy.types.Scene.blendmark_interactive_proxy
     del bpy.types.Scene.blendmark_curve_points
     del bpy.types.Scene.blendmark_use_auto_naming
     for cls in reversed(classes):
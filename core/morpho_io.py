@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Multi-specimen export for geometric morphometrics software: every landmark
+set in the scene (or the selected ones) is written into a single TPS or
+Morphologika file, as read by geomorph, MorphoJ and friends.
+
+Within each specimen points follow the .pts order (see pts_format.pts_order):
+fixed landmarks by number, then semilandmarks curve by curve. Specimens are
+read and written one at a time, so memory stays flat however large the
+study is; only the point counts of all sets are gathered up front, to check
+that every specimen has the same layout before anything is written.
+"""
+
+import bpy
+import numpy as np
+from bpy.props import BoolProperty, EnumProperty, StringProperty
+from bpy.types import Operator
+from bpy_extras.io_utils import ExportHelper
+
+from . import registry
+from .landmark_data import KIND_SEMI, read_points
+from .pts_format import atomic_output, pts_order
+from .utils import is_landmark_set
+
+_EXTENSIONS = {'TPS': ".tps", 'MORPHOLOGIKA': ".txt"}
+
+
+class SpecimenMismatchError(Exception):
+    pass
+
+
+def specimen_counts(landmark_set):
+    """(fixed landmarks, semilandmarks) of a landmark set."""
+    kind = read_points(landmark_set, fields=("kind",))["kind"]
+    n_semi = int(np.count_nonzero(kind == KIND_SEMI))
+    return len(kind) - n_semi, n_semi
+
+
+def check_specimens(landmark_sets):
+    """
+    Raise SpecimenMismatchError unless every set has the same number of fixed
+    landmarks and of semilandmarks. Returns the total points per specimen.
+    """
+    if not landmark_sets:
+        raise SpecimenMismatchError("No landmark sets to export")
+    reference = landmark_sets[0]
+    expected = specimen_counts(reference)
+    for landmark_set in landmark_sets[1:]:
+        counts = specimen_counts(landmark_set)
+        if counts != expected:
+            raise SpecimenMismatchError(
+                f"'{landmark_set.name}' has {counts[0]} landmarks and {counts[1]} semilandmarks, "
+                f"'{reference.name}' has {expected[0]} and {expected[1]}"
+            )
+    return sum(expected)
+
+
+def _coordinate_lines(arrays):
+    co = np.asarray(arrays["co"], dtype=np.float64).reshape(-1, 3)[pts_order(arrays)]
+    return ("%.6e %.6e %.6e\n" * len(co)) % tuple(co.reshape(-1).tolist())
+
+
+def write_tps(f, landmark_sets, progress=None):
+    """Stream the sets into an open text file as a 3D TPS file (LM3=, coordinates, ID=)."""
+    for done, landmark_set in enumerate(landmark_sets, start=1):
+        arrays = read_points(landmark_set, fields=("name", "co", "kind", "curve_id", "curve_index"))
+        f.write(f"LM3={len(arrays['name'])}\n")
+        f.write(_coordinate_lines(arrays))
+        f.write(f"ID={landmark_set.name}\n")
+        if progress is not None:
+            progress(done)
+
+
+def write_morphologika(f, landmark_sets, points_per_specimen, progress=None):
+    """Stream the sets into an open text file as a Morphologika file."""
+    f.write(f"[individuals]\n{len(landmark_sets)}\n")
+    f.write(f"[landmarks]\n{points_per_specimen}\n")
+    f.write("[dimensions]\n3\n")
+    f.write("[names]\n")
+    for landmark_set in landmark_sets:
+        f.write(f"{landmark_set.name}\n")
+    f.write("[rawpoints]\n")
+    for done, landmark_set in enumerate(landmark_sets, start=1):
+        arrays = read_points(landmark_set, fields=("name", "co", "kind", "curve_id", "curve_index"))
+        f.write(f"'{landmark_set.name}\n")
+        f.write(_coordinate_lines(arrays))
+        if progress is not None:
+            progress(done)
+
+
+def export_specimens(filepath, landmark_sets, file_format, progress=None):
+    """
+    Check the sets, then write them into `filepath` as 'TPS' or 'MORPHOLOGIKA'.
+    The file is written next to its destination and renamed into place, so a
+    failed export never leaves a truncated file behind.
+    """
+    points_per_specimen = check_specimens(landmark_sets)
+    with atomic_output(filepath) as tmp_path, open(tmp_path, 'w', encoding="utf-8") as f:
+        if file_format == 'TPS':
+            write_tps(f, landmark_sets, progress)
+        else:
+            write_morphologika(f, landmark_sets, points_per_specimen, progress)
+
+
+class VIEW3D_OT_BlendMark_ExportSpecimensOperator(Operator, ExportHelper):
+    bl_idname = "view3d.blendmark_export_specimens"
+    bl_label = "Export Specimens (TPS/Morphologika)"
+    bl_options = {'REGISTER'}
+    bl_description = (
+        "Export every landmark set in the scene (or only the selected ones) as the "
+        "specimens of a single TPS or Morphologika file"
+    )
+
+    filename_ext = ".tps"
+    filter_glob: StringProperty(default="*.tps;*.txt", options={'HIDDEN'})
+
+    file_format: EnumProperty(
+        name="Format",
+        items=[
+            ('TPS', "TPS", "3D TPS file (LM3=), read by geomorph and MorphoJ"),
+            ('MORPHOLOGIKA', "Morphologika", "Morphologika text file, read by geomorph and MorphoJ"),
+        ],
+        default='TPS',
+    )
+    selected_only: BoolProperty(
+        name="Selected Sets Only",
+        description="Only export the selected landmark sets instead of every set in the scene",
+        default=False,
+    )
+
+    def _landmark_sets(self, context):
+        if self.selected_only:
+            objects = [obj for obj in context.selected_objects if is_landmark_set(obj)]
+        else:
+            objects = registry.landmark_sets()
+        return sorted(
+            (obj for obj in objects if len(obj.blendmark_points) > 0),
+            key=lambda obj: obj.name,
+        )
+
+    def check(self, context):
+        self.filename_ext = _EXTENSIONS[self.file_format]
+        return super().check(context)
+
+    def invoke(self, context, event):
+        self.filename_ext = _EXTENSIONS[self.file_format]
+        return super().invoke(context, event)
+
+    def execute(self, context):
+        landmark_sets = self._landmark_sets(context)
+        wm = context.window_manager
+        wm.progress_begin(0, max(len(landmark_sets), 1))
+        try:
+            export_specimens(self.filepath, landmark_sets, self.file_format, progress=wm.progress_update)
+        except SpecimenMismatchError as exc:
+            self.report({'ERROR'}, f"Specimens do not match: {exc}")
+            return {'CANCELLED'}
+        except OSError as exc:
+            self.report({'ERROR'}, f"Could not write '{self.filepath}': {exc}")
+            return {'CANCELLED'}
+        finally:
+            wm.progress_end()
+
+        self.report({'INFO'}, f"Exported {len(landmark_sets)} specimen(s) to '{self.filepath}'")
+        return {'FINISHED'}
+
+
+classes = (VIEW3D_OT_BlendMark_ExportSpecimensOperator,)
+
+
+def register():
+    for cls in classes:
+        bpy.utils.register_class(cls)
+
+
+def unregister():
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
@@ -7,19 +7,48 @@ Points are never turned into mesh geometry: they are drawn every frame as
 screen-space circles (and connecting lines for semilandmark curves) using the
 `gpu` module, the same approach used by the aligner-blender add-on. This
 keeps the scene free of extra geometry and makes points trivial to move.
+
+All markers of a set are packed into a single triangle batch (and all of its
+curves into a single line batch), so drawing a set costs a constant number of
+GPU calls however many semilandmarks it holds. Only the hover/active
+highlights are drawn as separate, tiny batches.
+
+The freehand stroke of the curve tool lives in an append-only StrokeBuffer
+that the operator fills and the overlay draws: each new sample is projected
+once, and earlier ones are only re-projected when the view changes.
+
+Labels are decluttered: they are placed by priority (hovered point, active
+point, fixed landmarks, then semilandmarks) on a screen occupancy grid, and
+one overlapping a label already placed is dropped. Curves only label every
+k-th point -- down to one label per curve -- when zooming out packs their
+points closer than a label.
+Labels are drawn after every set's markers, so they stay readable on top.
+
+Each set also caches world-space bounding boxes: one for the whole set and
+one per culling group (its fixed landmarks, and each curve). Sets and groups
+entirely off screen are skipped before any point is projected, so a frame
+zoomed into a small area only pays for the points around it.
+
+What a set looks like (positions, colors, curve connectivity, names) is
+cached per set and only re-read from its points when the set's version
+changes (see landmark_data.tag_points_changed), so orbiting the view never
+touches the stored points.
 """
 
 import colorsys
+import functools
 import hashlib
 import math
 
 import blf
 import bpy
 import gpu
+import numpy as np
 from gpu_extras.batch import batch_for_shader
-from bpy_extras.view3d_utils import location_3d_to_region_2d
 
-from .utils import is_landmark_set
+from . import registry
+from .landmark_data import KIND_SEMI, points_version, read_points
+from .utils import boxes_in_view, is_landmark_set, project_points, view_key
 
 LANDMARK_COLOR = (1.0, 0.55, 0.05, 1.0)
 ACTIVE_COLOR = (1.0, 1.0, 0.15, 1.0)
@@ -27,6 +56,15 @@ HOVER_COLOR = (1.0, 1.0, 1.0, 1.0)
 STROKE_COLOR = (0.25, 0.9, 1.0, 0.95)
 BANNER_BG = (0.05, 0.05, 0.05, 0.75)
 POINT_SEGMENTS = 16
+LABEL_FONT_SIZE = 12
+# Label text position relative to its marker, in pixels.
+LABEL_OFFSET = (8, 6)
+# Typical label width in pixels, for thinning the labels of curves.
+LABEL_WIDTH = 56
+# Side in pixels of the cells of the label occupancy grid.
+LABEL_GRID_CELL = 8
+# How far off screen a point may sit and still show part of its marker or label.
+CULL_MARGIN_PX = 80.0
 
 # State of the interactive editing tool, kept here so the overlay can show what
 # is going on and the panel can offer a "Finish" button (see landmark_ops.py).
@@ -36,8 +74,6 @@ TOOL_STATE = {
     "target_name": "",
     "hover_index": -1,
     "region": None,
-    # World-space points of the freehand stroke currently being drawn.
-    "stroke": [],
     "hint": "",
 }
 
@@ -50,17 +86,87 @@ def is_tool_active():
     return TOOL_STATE["active"]
 
 
+class StrokeBuffer:
+    """
+    World-space samples of the freehand stroke being drawn, in arrays that
+    grow by doubling, together with their cached screen projection and the
+    preview batch built from it.
+    """
+
+    def __init__(self, capacity=256):
+        self._co = np.empty((capacity, 3), dtype=np.float64)
+        self._screen = np.empty((capacity, 2), dtype=np.float32)
+        self._visible = np.zeros(capacity, dtype=bool)
+        self._count = 0
+        # Samples [0, _projected) have valid screen positions for _view.
+        self._projected = 0
+        self._view = None
+        self._batch = None
+
+    def __len__(self):
+        return self._count
+
+    def coords(self):
+        """(N, 3) view of the samples so far; copy it to keep it past clear()."""
+        return self._co[:self._count]
+
+    def append(self, co):
+        if self._count == len(self._co):
+            capacity = 2 * len(self._co)
+            self._co = np.resize(self._co, (capacity, 3))
+            self._screen = np.resize(self._screen, (capacity, 2))
+            self._visible = np.resize(self._visible, capacity)
+        self._co[self._count] = tuple(co)
+        self._count += 1
+        self._batch = None
+
+    def clear(self):
+        self._count = self._projected = 0
+        self._batch = None
+
+    def preview_batch(self, region, rv3d):
+        """LINE_STRIP batch through the visible samples as seen in this view, or None."""
+        key = view_key(region, rv3d)
+        if key != self._view:
+            self._view = key
+            self._projected = 0
+            self._batch = None
+        if self._projected < self._count:
+            screen, visible = project_points(region, rv3d, self._co[self._projected:self._count])
+            self._screen[self._projected:self._count] = screen
+            self._visible[self._projected:self._count] = visible
+            self._projected = self._count
+        if self._batch is None:
+            points = self._screen[:self._count][self._visible[:self._count]]
+            if len(points) < 2:
+                return None
+            self._batch = batch_for_shader(_get_shader(), 'LINE_STRIP', {"pos": points})
+        return self._batch
+
+
+STROKE_BUFFER = StrokeBuffer()
+
+
 _handler = None
-_shader = None
+_shaders = {}
+
+# Unit circle shared by every marker, and the triangle fan that fills it.
+_UNIT_CIRCLE = np.array(
+    [(math.cos(2.0 * math.pi * i / POINT_SEGMENTS), math.sin(2.0 * math.pi * i / POINT_SEGMENTS), 0.0)
+     for i in range(POINT_SEGMENTS)],
+    dtype=np.float32,
+)
+_CIRCLE_FAN = np.array([(0, i, i + 1) for i in range(1, POINT_SEGMENTS - 1)], dtype=np.int32)
 
 
-def _get_shader():
-    global _shader
-    if _shader is None:
-        _shader = gpu.shader.from_builtin('UNIFORM_COLOR')
-    return _shader
+def _get_shader(name='UNIFORM_COLOR'):
+    shader = _shaders.get(name)
+    if shader is None:
+        shader = _shaders[name] = gpu.shader.from_builtin(name)
+    return shader
 
 
+@functools.lru_cache(maxsize=None)
 def _curve_color(curve_id):
     h = int(hashlib.md5(str(curve_id).encode()).hexdigest(), 16)
     hue = (h % 360) / 360.0
@@ -84,23 +190,138 @@ def _draw_filled_circle(cx, cy, radius, color):
     batch.draw(shader)
 
 
-def _draw_line_strip(points_2d, color, width=2.0):
-    if len(points_2d) < 2:
+def _draw_markers(centers, radii, colors):
+    """
+    Draw every marker of a set in one call: each (x, y) center is expanded
+    into a POINT_SEGMENTS-gon and all of them go into a single TRIS batch.
+    """
+    count = len(centers)
+    if count == 0:
         return
-    shader = _get_shader()
+    centers = np.asarray(centers, dtype=np.float32).reshape(count, 2)
+    radii = np.asarray(radii, dtype=np.float32).reshape(count, 1, 1)
+    colors = np.asarray(colors, dtype=np.float32).reshape(count, 4)
+
+    verts = np.zeros((count, POINT_SEGMENTS, 3), dtype=np.float32)
+    verts[:, :, :2] = centers[:, None, :]
+    verts += radii * _UNIT_CIRCLE[None, :, :]
+    vert_colors = np.repeat(colors, POINT_SEGMENTS, axis=0)
+    offsets = (np.arange(count, dtype=np.int32) * POINT_SEGMENTS)[:, None, None]
+    indices = (_CIRCLE_FAN[None, :, :] + offsets).reshape(-1, 3)
+
+    shader = _get_shader('FLAT_COLOR')
+    batch = batch_for_shader(
+        shader, 'TRIS',
+        {"pos": verts.reshape(-1, 3), "color": vert_colors},
+        indices=indices,
+    )
+    batch.draw(shader)
+
+
+def _draw_segments(ends_2d, colors, width=2.0):
+    """Draw line segments, given as consecutive pairs of (x, y) ends, as one LINES batch."""
+    count = len(ends_2d)
+    if count == 0:
+        return
+    positions = np.zeros((count, 3), dtype=np.float32)
+    positions[:, :2] = ends_2d
+    shader = _get_shader('FLAT_COLOR')
     gpu.state.line_width_set(width)
-    batch = batch_for_shader(shader, 'LINE_STRIP', {"pos": points_2d})
-    shader.uniform_float("color", color)
+    batch = batch_for_shader(
+        shader, 'LINES', {"pos": positions, "color": np.ascontiguousarray(colors, dtype=np.float32)},
+    )
     batch.draw(shader)
     gpu.state.line_width_set(1.0)
 
 
-def _draw_label(cx, cy, text):
+def _draw_labels(positions, texts):
+    """Draw each text next to its (x, y) marker position."""
     font_id = 0
-    blf.position(font_id, cx + 8, cy + 6, 0)
-    blf.size(font_id, 12)
+    blf.size(font_id, LABEL_FONT_SIZE)
     blf.color(font_id, 1.0, 1.0, 1.0, 1.0)
-    blf.draw(font_id, text)
+    dx, dy = LABEL_OFFSET
+    for (x, y), text in zip(positions.tolist(), texts):
+        blf.position(font_id, x + dx, y + dy, 0)
+        blf.draw(font_id, text)
+
+
+def _label_rects(positions, texts):
+    """Screen rectangles (x0, y0, x1, y1) the labels drawn by _draw_labels() cover."""
+    font_id = 0
+    blf.size(font_id, LABEL_FONT_SIZE)
+    widths = np.array([blf.dimensions(font_id, text)[0] for text in texts], dtype=np.float64)
+    _width, height = blf.dimensions(font_id, "Ag")
+    # Text sits on its baseline; leave room for descenders below it.
+    x0 = positions[:, 0] + LABEL_OFFSET[0]
+    y0 = positions[:, 1] + LABEL_OFFSET[1] - height * 0.3
+    return np.column_stack((x0, y0, x0 + widths, y0 + height * 1.3))
+
+
+def _label_candidates(data, screen, visible, hover_index, active_index):
+    """
+    Indices of the visible points of a set that may get a label, and their
+    priorities (0 hovered, 1 active, 2 fixed landmark, 3 semilandmark).
+    Curves only offer every k-th point, k growing as their on-screen spacing
+    drops below a label's width -- down to one label per curve.
+    """
+    count = data["count"]
+    curve_slot, curve_rank = data["curve_slot"], data["curve_rank"]
+    candidates = visible.copy()
+
+    segments = data["segments"]
+    if len(segments):
+        seg_visible = visible[segments].all(axis=1)
+        a, b = segments[seg_visible, 0], segments[seg_visible, 1]
+        slots = curve_slot[a]
+        curves = data["curve_count"]
+        length = np.bincount(slots, weights=np.linalg.norm(screen[b] - screen[a], axis=1), minlength=curves)
+        steps = np.bincount(slots, minlength=curves)
+        spacing = np.divide(length, steps, out=np.full(curves, np.inf), where=steps > 0)
+        stride = np.ceil(LABEL_WIDTH / np.maximum(spacing, 1e-6)).astype(np.int64).clip(1)
+        semi = curve_slot >= 0
+        candidates[semi] &= curve_rank[semi] % stride[curve_slot[semi]] == 0
+
+    priority = np.where(curve_slot >= 0, 3, 2)
+    if 0 <= active_index < count:
+        priority[active_index] = 1
+        candidates[active_index] = visible[active_index]
+    if 0 <= hover_index < count:
+        priority[hover_index] = 0
+        candidates[hover_index] = visible[hover_index]
+
+    indices = np.flatnonzero(candidates)
+    return indices, priority[indices]
+
+
+def _declutter(rects, priorities, region_size):
+    """
+    Indices of the labels to draw, no two of them overlapping. Going through
+    the on-screen labels by priority (the earliest one on ties), a label is
+    kept only when none of the LABEL_GRID_CELL cells its rectangle covers is
+    taken yet, and then takes them all.
+    """
+    width, height = region_size
+    onscreen = (rects[:, 2] > 0) & (rects[:, 0] < width) & (rects[:, 3] > 0) & (rects[:, 1] < height)
+    order = np.flatnonzero(onscreen)[np.argsort(priorities[onscreen], kind='stable')]
+    cols = int(width // LABEL_GRID_CELL) + 1
+    rows = int(height // LABEL_GRID_CELL) + 1
+    cells = np.floor(rects[order] / LABEL_GRID_CELL).astype(np.int64)
+    cells[:, 0::2] = cells[:, 0::2].clip(0, cols - 1)
+    cells[:, 1::2] = cells[:, 1::2].clip(0, rows - 1)
+
+    # Labels starting in the same cell always overlap: only the first of
+    # them can be kept, which bounds the loop below by the number of cells.
+    _unique, first = np.unique(cells[:, 0] * rows + cells[:, 1], return_index=True)
+    first.sort()
+
+    occupied = np.zeros((rows, cols), dtype=bool)
+    keep = []
+    for i, (x0, y0, x1, y1) in zip(first.tolist(), cells[first].tolist()):
+        block = occupied[y0:y1 + 1, x0:x1 + 1]
+        if not block.any():
+            block[:] = True
+            keep.append(order[i])
+    return np.sort(np.array(keep, dtype=np.int64))
 
 
 def _draw_rect(x0, y0, x1, y1, color):
@@ -132,6 +353,108 @@ def _draw_tool_banner(region):
     blf.draw(font_id, text)
 
 
+# ---------------------------------------------------------------------------
+# Per-set draw data cache
+# ---------------------------------------------------------------------------
+
+# session_uid -> draw data of a landmark set, see _set_draw_data(). Entries
+# of sets the registry no longer lists are dropped by _prune_draw_cache().
+_set_cache = {}
+
+
+def _build_draw_data(landmark_set):
+    arrays = read_points(landmark_set)
+    count = len(arrays["name"])
+    kind, curve_id, curve_index = arrays["kind"], arrays["curve_id"], arrays["curve_index"]
+
+    is_semi = kind == KIND_SEMI
+    colors = np.empty((count, 4), dtype=np.float32)
+    colors[:] = LANDMARK_COLOR
+    for cid in np.unique(curve_id[is_semi]):
+        colors[is_semi & (curve_id == cid)] = _curve_color(int(cid))
+
+    # Curve connectivity: semilandmarks ordered by (curve, index), joined to
+    # their successor when it belongs to the same curve.
+    semi = np.flatnonzero(is_semi)
+    order = semi[np.lexsort((curve_index[semi], curve_id[semi]))]
+    same_curve = curve_id[order[1:]] == curve_id[order[:-1]]
+    segments = np.column_stack((order[:-1][same_curve], order[1:][same_curve]))
+
+    # Each semilandmark's curve (0 .. curves - 1, -1 for landmarks) and its
+    # position along it, for the label level of detail.
+    curve_ids, first, slots = np.unique(curve_id[order], return_index=True, return_inverse=True)
+    curve_slot = np.full(count, -1, dtype=np.int64)
+    curve_rank = np.zeros(count, dtype=np.int64)
+    curve_slot[order] = slots.reshape(-1)
+    curve_rank[order] = np.arange(len(order)) - first[slots.reshape(-1)]
+
+    # Culling groups: 0 holds the fixed landmarks, 1 + slot each curve. Points
+    # and segments are listed group by group, with a bounding box per group.
+    groups = len(curve_ids) + 1
+    group = curve_slot + 1
+    group_points = np.argsort(group, kind='stable')
+    point_starts = np.searchsorted(group[group_points], np.arange(groups + 1))
+    segment_starts = np.searchsorted(curve_slot[segments[:, 0]] + 1, np.arange(groups + 1))
+    nonempty = point_starts[1:] > point_starts[:-1]
+    co = arrays["co"].astype(np.float64)
+    box_min = np.zeros((groups, 3))
+    box_max = np.zeros((groups, 3))
+    if count:
+        sorted_co = co[group_points]
+        box_min[nonempty] = np.minimum.reduceat(sorted_co, point_starts[:-1][nonempty], axis=0)
+        box_max[nonempty] = np.maximum.reduceat(sorted_co, point_starts[:-1][nonempty], axis=0)
+
+    return {
+        "count": count,
+        "co": arrays["co"],
+        "colors": colors,
+        "radius_scale": np.where(is_semi, 0.6, 1.0).astype(np.float32),
+        "segments": segments.astype(np.int64).reshape(-1, 2),
+        "names": arrays["name"],
+        "curve_slot": curve_slot,
+        "curve_rank": curve_rank,
+        "curve_count": len(curve_ids),
+        "group_points": group_points,
+        "point_starts": point_starts,
+        "segment_starts": segment_starts,
+        "group_nonempty": nonempty,
+        "box_min": box_min,
+        "box_max": box_max,
+        "set_box": (co.min(axis=0), co.max(axis=0)) if count else None,
+    }
+
+
+def _concat_ranges(starts, ends):
+    """The indices start..end-1 of every (start, end) pair, concatenated."""
+    lengths = ends - starts
+    # Position within the output minus position within the range, per range.
+    shift = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return np.arange(len(shift)) + shift
+
+
+def _set_draw_data(obj):
+    """Cached draw data for a landmark set, rebuilt only when its points changed."""
+    key = obj.session_uid
+    version = points_version(obj)
+    entry = _set_cache.get(key)
+    if entry is None or entry["version"] != version or entry["count"] != len(obj.blendmark_points):
+        entry = _build_draw_data(obj)
+        entry["version"] = version
+        _set_cache[key] = entry
+    return entry
+
+
+def _prune_draw_cache(landmark_sets):
+    """Forget the draw data of deleted sets, and of sets from files since closed."""
+    stale = _set_cache.keys() - {obj.session_uid for obj in landmark_sets}
+    for key in stale:
+        del _set_cache[key]
+
+
+def clear_draw_cache():
+    _set_cache.clear()
+
+
 def _draw_callback():
     context = bpy.context
     region = context.region
@@ -147,48 +470,75 @@ def _draw_callback():
 
     gpu.state.blend_set('ALPHA')
 
-    for obj in context.visible_objects:
-        if not is_landmark_set(obj):
+    # Label candidates of every set, decluttered together once all markers are drawn.
+    label_positions, label_priorities, label_texts = [], [], []
+
+    viewport = context.space_data
+    landmark_sets = registry.landmark_sets()
+    _prune_draw_cache(landmark_sets)
+    for obj in landmark_sets:
+        if not obj.visible_get(viewport=viewport):
             continue
 
-        points = obj.blendmark_points
-        curves = {}
+        data = _set_draw_data(obj)
+        count = data["count"]
+        if count == 0:
+            continue
         is_active_set = obj is active_set
         active_index = obj.blendmark_active_index if is_active_set else -1
 
-        for i, point in enumerate(points):
-            co_2d = location_3d_to_region_2d(region, rv3d, point.co)
-            if co_2d is None:
-                continue
-
-            if point.kind == 'SEMI':
-                curves.setdefault(point.curve_id, []).append((point.curve_index, co_2d))
-                color = _curve_color(point.curve_id)
-                point_radius = radius * 0.6
-            else:
-                color = LANDMARK_COLOR
-                point_radius = radius
-
-            if is_active_set and i == hover_index:
-                _draw_filled_circle(co_2d.x, co_2d.y, point_radius + 5, HOVER_COLOR)
-
-            if i == active_index:
-                _draw_filled_circle(co_2d.x, co_2d.y, point_radius + 3, ACTIVE_COLOR)
-
-            _draw_filled_circle(co_2d.x, co_2d.y, point_radius, color)
-
-            if show_labels:
-                _draw_label(co_2d.x, co_2d.y, point.point_name)
+        set_min, set_max = data["set_box"]
+        if not boxes_in_view(region, rv3d, set_min[None], set_max[None], CULL_MARGIN_PX)[0]:
+            continue
 
-        for curve_id, entries in curves.items():
-            entries.sort(key=lambda e: e[0])
-            _draw_line_strip([e[1] for e in entries], _curve_color(curve_id))
+        # Only project the groups (landmarks, curves) whose box is on screen;
+        # everything else keeps visible=False.
+        shown = data["group_nonempty"] & boxes_in_view(
+            region, rv3d, data["box_min"], data["box_max"], CULL_MARGIN_PX
+        )
+        starts, ends = data["point_starts"][:-1][shown], data["point_starts"][1:][shown]
+        indices = data["group_points"][_concat_ranges(starts, ends)]
+        screen = np.zeros((count, 2))
+        visible = np.zeros(count, dtype=bool)
+        screen[indices], visible[indices] = project_points(region, rv3d, data["co"][indices])
+
+        starts, ends = data["segment_starts"][:-1][shown], data["segment_starts"][1:][shown]
+        segments = data["segments"][_concat_ranges(starts, ends)]
+        segments = segments[visible[segments].all(axis=1)]
+        _draw_segments(screen[segments].reshape(-1, 2), data["colors"][segments].reshape(-1, 4))
+
+        # Highlights go underneath, so the marker itself stays on top.
+        radii = data["radius_scale"] * radius
+        if is_active_set and 0 <= hover_index < count and visible[hover_index]:
+            x, y = screen[hover_index]
+            _draw_filled_circle(x, y, radii[hover_index] + 5, HOVER_COLOR)
+        if 0 <= active_index < count and visible[active_index]:
+            x, y = screen[active_index]
+            _draw_filled_circle(x, y, radii[active_index] + 3, ACTIVE_COLOR)
+        _draw_markers(screen[visible], radii[visible], data["colors"][visible])
+
+        if show_labels:
+            hovered = hover_index if is_active_set else -1
+            indices, priorities = _label_candidates(data, screen, visible, hovered, active_index)
+            names = data["names"]
+            label_positions.append(screen[indices])
+            label_priorities.append(priorities)
+            label_texts.extend(names[i] for i in indices.tolist())
+
+    if label_texts:
+        positions = np.concatenate(label_positions)
+        rects = _label_rects(positions, label_texts)
+        keep = _declutter(rects, np.concatenate(label_priorities), (region.width, region.height))
+        _draw_labels(positions[keep], [label_texts[i] for i in keep.tolist()])
 
     if TOOL_STATE["active"] and TOOL_STATE["region"] == region:
-        stroke = TOOL_STATE["stroke"]
-        if stroke:
-            stroke_2d = [location_3d_to_region_2d(region, rv3d, co) for co in stroke]
-            _draw_line_strip([p for p in stroke_2d if p is not None], STROKE_COLOR, width=3.0)
+        batch = STROKE_BUFFER.preview_batch(region, rv3d)
+        if batch is not None:
+            shader = _get_shader()
+            gpu.state.line_width_set(3.0)
+            shader.uniform_float("color", STROKE_COLOR)
+            batch.draw(shader)
+            gpu.state.line_width_set(1.0)
         _draw_tool_banner(region)
 
     gpu.state.blend_set('NONE')
@@ -205,8 +555,10 @@ def unregister_overlay():
     if _handler is not None:
         bpy.types.SpaceView3D.draw_handler_remove(_handler, 'WINDOW')
         _handler = None
+    clear_draw_cache()
     set_tool_state(active=False, set_name="", target_name="", hover_index=-1,
-                   region=None, stroke=[], hint="")
+                   region=None, hint="")
+    STROKE_BUFFER.clear()
 
 
 class VIEW3D_OT_BlendMark_ToggleOverlayOperator(bpy.types.Operator):
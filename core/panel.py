@@ -6,6 +6,7 @@ Main BlendMark UI panel.
 
 import bpy
 
+from .landmark_data import KIND_LANDMARK, read_points
 from .overlay import is_tool_active
 from .utils import is_landmark_set, is_valid_target
 
@@ -54,6 +55,11 @@ class VIEW3D_PT_BlendMark_Panel_PT(bpy.types.Panel):
             box.label(text="Must be a mesh or image empty", icon='ERROR')
         else:
             box.label(text="Landmarks land on this object only", icon='CHECKMARK')
+        row = box.row(align=True)
+        row.prop(scene, "blendmark_interactive_proxy", text="Interactive Proxy", toggle=True)
+        sub = row.row(align=True)
+        sub.enabled = scene.blendmark_interactive_proxy
+        sub.prop(scene, "blendmark_proxy_faces", text="Faces")
 
         layout.separator()
         box = layout.box()
@@ -64,7 +70,7 @@ class VIEW3D_PT_BlendMark_Panel_PT(bpy.types.Panel):
         else:
             col = box.column(align=True)
             col.label(text=f"Active set: {landmark_set.name}", icon='EMPTY_AXIS')
-            n_landmarks = sum(1 for p in landmark_set.blendmark_points if p.kind == 'LANDMARK')
+            n_landmarks = int((read_points(landmark_set, fields=("kind",))["kind"] == KIND_LANDMARK).sum())
             n_semi = len(landmark_set.blendmark_points) - n_landmarks
             col.label(text=f"{n_landmarks} landmarks, {n_semi} semilandmarks")
 
@@ -117,25 +123,35 @@ class VIEW3D_PT_BlendMark_Panel_PT(bpy.types.Panel):
         col.label(text="or, from an edge path in Edit Mode:")
         col.operator("view3d.blendmark_generate_semilandmarks", text="From Selected Edge Path", icon='IPO_EASE_IN_OUT')
 
+        row = box.row()
+        row.enabled = landmark_set is not None and not tool_active
+        row.operator("view3d.blendmark_resample_curves", text="Resample All Curves", icon='MOD_SMOOTH')
+
         layout.separator()
         box = layout.box()
         box.label(text="Viewport display", icon='RESTRICT_VIEW_OFF')
         row = box.row()
         row.prop(scene, "blendmark_point_size", text="Point Size")
         row.prop(scene, "blendmark_show_labels", text="Labels", toggle=True)
+        box.prop(scene, "blendmark_redraw_rate", text="Max Redraw Rate (fps)")
         box.operator("view3d.blendmark_toggle_overlay", text="Show/Hide Landmark Set", icon='HIDE_OFF')
 
         layout.separator()
         box = layout.box()
         box.label(text="Export", icon='EXPORT')
         box.operator("view3d.blendmark_export_pts", text="Export .pts", icon='EXPORT')
-        box.operator("view3d.blendmark_export_all_pts", text="Export All Sets to Folder", icon='EXPORT')
+        row = box.row(align=True)
+        row.operator("view3d.blendmark_export_all_pts", text="Export All Sets to Folder", icon='EXPORT')
+        row.operator("view3d.blendmark_export_all_pts", text="", icon='FILE_REFRESH').force = True
         box.operator("view3d.blendmark_export_csv", text="Export CSV", icon='EXPORT')
+        box.operator("view3d.blendmark_export_bmk", text="Export .bmk (binary)", icon='EXPORT')
+        box.operator("view3d.blendmark_export_specimens", text="Export Specimens (TPS/Morphologika)", icon='EXPORT')
 
         layout.separator()
         box = layout.box()
         box.label(text="Import", icon='IMPORT')
         box.operator("view3d.blendmark_import_pts", text="Import .pts", icon='IMPORT')
+        box.operator("view3d.blendmark_import_bmk", text="Import .bmk (binary)", icon='IMPORT')
 
 
 classes = (
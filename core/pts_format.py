@@ -0,0 +1,413 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+The .pts landmark format itself, independent of Blender:
+
+    Version 1.0
+    <point count>
+    S.1 <x> <y> <z>
+    ...
+    C.<curve>.<index> <x> <y> <z>
+    ...
+
+"S.N" rows are ordinary landmarks, "C.<curve>.<index>" rows are semilandmarks
+sampled along curve <curve>, in order. Points are exchanged as dicts (one per
+row) or as the point arrays of landmark_data.POINT_FIELDS.
+
+Files may be gzip (.pts.gz) or, when a zstd module is available, zstd
+(.pts.zst) compressed. Compression is detected from the magic bytes when
+reading and from the extension when writing, and (de)compression streams
+alongside parsing/formatting, so a file is never held in memory whole.
+
+This module only needs NumPy, so it can be loaded on its own outside Blender
+(see benchmarks/); the operators live in pts_io.py.
+"""
+
+import contextlib
+import gzip
+import os
+import threading
+import zlib
+
+import numpy as np
+
+# landmark_data.KIND_LANDMARK / KIND_SEMI, repeated here so this module does
+# not depend on bpy.
+KIND_LANDMARK = 0
+KIND_SEMI = 1
+
+# zstd support: the standard library module from Python 3.14, or the
+# third-party 'zstandard' package; both provide a gzip-style open().
+try:
+    from compression import zstd as _zstd
+    _ZSTD_ERRORS = (_zstd.ZstdError,)
+except ImportError:
+    try:
+        import zstandard as _zstd
+        _ZSTD_ERRORS = (_zstd.ZstdError,)
+    except ImportError:
+        _zstd = None
+        _ZSTD_ERRORS = ()
+HAS_ZSTD = _zstd is not None
+
+
+class PtsParseError(Exception):
+    pass
+
+
+# Rows formatted at a time by write_pts_arrays, and characters of text read
+# at a time by parse_pts_arrays, bounding the text held in memory while
+# streaming through large files.
+_CHUNK_ROWS = 65536
+_CHUNK_CHARS = 4 << 20
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+PTS_EXTENSIONS = {'NONE': ".pts", 'GZIP': ".pts.gz", 'ZSTD': ".pts.zst"}
+PTS_GLOB = "*.pts;*.pts.gz" + (";*.pts.zst" if HAS_ZSTD else "")
+
+# Raised by a damaged compressed stream part-way through reading it. Other
+# OSErrors mean the file itself is unreadable. ValueError covers decoders
+# rejecting a frame, and UnicodeDecodeError text in another encoding.
+_STREAM_ERRORS = (EOFError, ValueError, zlib.error, gzip.BadGzipFile) + _ZSTD_ERRORS
+
+
+def compression_from_extension(filepath):
+    """'GZIP', 'ZSTD' or 'NONE', from the extension of `filepath`."""
+    lower = filepath.lower()
+    if lower.endswith(".gz"):
+        return 'GZIP'
+    if lower.endswith(".zst"):
+        return 'ZSTD'
+    return 'NONE'
+
+
+def _sniff_compression(filepath):
+    with open(filepath, 'rb') as f:
+        magic = f.read(4)
+    if magic.startswith(_GZIP_MAGIC):
+        return 'GZIP'
+    if magic == _ZSTD_MAGIC:
+        return 'ZSTD'
+    return 'NONE'
+
+
+def open_pts(filepath, mode='r', compression=None):
+    """
+    Open a possibly compressed .pts file in text mode ('r' or 'w'), as UTF-8
+    whatever the system locale, so any landmark name can be written and read
+    back. Without an explicit `compression`, it is detected from the magic
+    bytes when reading and from the extension when writing.
+    """
+    if compression is None:
+        compression = _sniff_compression(filepath) if mode == 'r' else compression_from_extension(filepath)
+    if compression == 'GZIP':
+        # Level 6 compresses text floats nearly as well as 9, several times faster.
+        if mode == 'w':
+            return gzip.open(filepath, 'wt', compresslevel=6, encoding="utf-8")
+        return gzip.open(filepath, 'rt', encoding="utf-8")
+    if compression == 'ZSTD':
+        if not HAS_ZSTD:
+            raise OSError("zstd compressed .pts files need Python 3.14 or the 'zstandard' package")
+        return _zstd.open(filepath, mode + 't', encoding="utf-8")
+    return open(filepath, mode, encoding="utf-8")
+
+
+def pts_stem(filepath):
+    """File name without its .pts (and compression) extension."""
+    name = os.path.basename(filepath)
+    for ext in (".gz", ".zst"):
+        if name.lower().endswith(ext):
+            name = name[:-len(ext)]
+            break
+    return os.path.splitext(name)[0]
+
+
+def _stream_error(exc):
+    """PtsParseError for a file whose bytes could not be read back as text."""
+    if isinstance(exc, UnicodeDecodeError):
+        return PtsParseError(f"Not a text file in the expected encoding: {exc}")
+    return PtsParseError(f"Corrupt compressed file: {exc}")
+
+
+def _pts_rows(f):
+    """
+    Check the header of an open .pts file and lazily yield (line_no, line) for
+    each point row, line_no being the 1-based line number in the file.
+    """
+    header_seen = count_seen = False
+    for line_no, line in enumerate(f, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        if not header_seen:
+            if not line.lower().startswith("version"):
+                raise PtsParseError(f"Expected a 'Version ...' header, found: '{line}'")
+            header_seen = True
+        elif not count_seen:
+            # The declared point count; trust the actual rows instead.
+            count_seen = True
+        else:
+            yield line_no, line
+    if not header_seen:
+        raise PtsParseError("File is empty")
+
+
+def _parse_row(line_no, line):
+    parts = line.split()
+    if len(parts) != 4:
+        raise PtsParseError(f"Line {line_no}: expected '<name> <x> <y> <z>', got: '{line}'")
+    name, x, y, z = parts
+    try:
+        x, y, z = float(x), float(y), float(z)
+    except ValueError:
+        raise PtsParseError(f"Line {line_no}: non-numeric coordinates in '{line}'")
+
+    if name.startswith("S."):
+        return {"name": name, "co": (x, y, z), "kind": 'LANDMARK', "curve_id": 0, "curve_index": 0}
+    if name.startswith("C."):
+        name_parts = name.split(".")
+        if len(name_parts) != 3:
+            raise PtsParseError(f"Line {line_no}: malformed curve point name '{name}', expected 'C.<curve>.<index>'")
+        try:
+            curve_id, curve_index = int(name_parts[1]), int(name_parts[2])
+        except ValueError:
+            raise PtsParseError(f"Line {line_no}: curve/index in '{name}' must be numeric")
+        return {
+            "name": name, "co": (x, y, z), "kind": 'SEMI',
+            "curve_id": curve_id, "curve_index": curve_index,
+        }
+    raise PtsParseError(f"Line {line_no}: point name '{name}' must start with 'S.' or 'C.'")
+
+
+def iter_pts(filepath):
+    """Lazily parse a .pts file, yielding one point dict per row (see parse_pts)."""
+    with open_pts(filepath) as f:
+        try:
+            for line_no, line in _pts_rows(f):
+                yield _parse_row(line_no, line)
+        except _STREAM_ERRORS as exc:
+            raise _stream_error(exc)
+
+
+def parse_pts(filepath):
+    """Parse a .pts file into a list of dicts: name, co, kind, curve_id, curve_index."""
+    return list(iter_pts(filepath))
+
+
+class _NeedsSlowPath(Exception):
+    pass
+
+
+def _skip_header(f):
+    """Consume the 'Version' and point count lines; anything unexpected is left to parse_pts."""
+    seen = 0
+    while True:
+        line = f.readline()
+        if not line:
+            break
+        line = line.strip()
+        if not line:
+            continue
+        if seen == 0 and not line.lower().startswith("version"):
+            raise _NeedsSlowPath()
+        seen += 1
+        if seen == 2:
+            return
+    raise _NeedsSlowPath()
+
+
+def _parse_block(text):
+    """
+    Point arrays of a block of whole rows: the text is split once and each
+    column converted in bulk by NumPy. Raises _NeedsSlowPath on any row it
+    cannot take at face value.
+    """
+    tokens = text.split()
+    if len(tokens) % 4:
+        raise _NeedsSlowPath()
+    names = np.array(tokens[0::4])
+    del tokens[0::4]
+    try:
+        co = np.array(tokens, dtype=np.float64).reshape(-1, 3)
+    except ValueError:
+        raise _NeedsSlowPath()
+
+    count = len(names)
+    kind = np.zeros(count, dtype=np.int32)
+    curve_id = np.zeros(count, dtype=np.int32)
+    curve_index = np.zeros(count, dtype=np.int32)
+    semi = ~np.char.startswith(names, "S.")
+    if semi.any():
+        # "C.<curve>.<index>" -> "C <curve> <index>", and both parts must be integers.
+        semi_text = " ".join(names[semi].tolist())
+        semi_count = int(semi.sum())
+        parts = semi_text.replace(".", " ").split()
+        if (semi_text.count(".") != 2 * semi_count or len(parts) != 3 * semi_count
+                or parts[0::3].count("C") != semi_count):
+            raise _NeedsSlowPath()
+        del parts[0::3]
+        try:
+            numbers = np.array(parts, dtype=np.int64).reshape(-1, 2)
+        except (ValueError, OverflowError):
+            raise _NeedsSlowPath()
+        if np.abs(numbers).max() > np.iinfo(np.int32).max:
+            raise _NeedsSlowPath()
+        kind[semi] = KIND_SEMI
+        curve_id[semi], curve_index[semi] = numbers.T
+    return names, co, kind, curve_id, curve_index
+
+
+def parse_pts_arrays(filepath):
+    """
+    Fast path of parse_pts: stream the file in blocks of whole rows and return
+    point arrays (see landmark_data.POINT_FIELDS) instead of one dict per row.
+    Each block is split once and its columns converted in bulk by NumPy.
+
+    Malformed input raises the same PtsParseError as parse_pts: on anything
+    the fast path cannot digest, the file is re-read by the row-by-row parser
+    to report (or accept) the exact line.
+    """
+    blocks = []
+    try:
+        with open_pts(filepath) as f:
+            _skip_header(f)
+            rest = ""
+            while True:
+                text = f.read(_CHUNK_CHARS)
+                if not text:
+                    break
+                # Only whole rows go into a block; the tail waits for the next read.
+                text = rest + text
+                end = text.rfind("\n") + 1
+                if end:
+                    blocks.append(_parse_block(text[:end]))
+                rest = text[end:]
+            if rest.strip():
+                blocks.append(_parse_block(rest))
+    except _NeedsSlowPath:
+        return dicts_to_arrays(parse_pts(filepath))
+    except _STREAM_ERRORS as exc:
+        raise _stream_error(exc)
+
+    if not blocks:
+        return dicts_to_arrays([])
+    names, co, kind, curve_id, curve_index = (np.concatenate(column) for column in zip(*blocks))
+    return {
+        "name": names.tolist(),
+        "co": co,
+        "kind": kind,
+        "curve_id": curve_id,
+        "curve_index": curve_index,
+    }
+
+
+def write_pts(filepath, points):
+    """Write points (dicts with name/co/kind, as produced by landmark_set_to_dicts) to a .pts file."""
+    write_pts_arrays(filepath, dicts_to_arrays(points))
+
+
+def pts_order(arrays):
+    """
+    Row order of a .pts file for the given point arrays, from one stable
+    lexsort: landmarks first, by their 'S.<n>' number (names without a number
+    follow, alphabetically), then semilandmarks by curve and index.
+    """
+    names, kind = arrays["name"], np.asarray(arrays["kind"])
+    count = len(names)
+    is_semi = kind == KIND_SEMI
+    landmarks = np.flatnonzero(~is_semi)
+
+    not_numbered = np.zeros(count, dtype=bool)
+    number = np.zeros(count, dtype=np.int64)
+    name_rank = np.zeros(count, dtype=np.int64)
+    unnumbered = []
+    for i in landmarks:
+        key = _landmark_sort_key(names[i])
+        if isinstance(key, int):
+            number[i] = key
+        else:
+            not_numbered[i] = True
+            unnumbered.append(i)
+    if unnumbered:
+        _unique, ranks = np.unique([names[i] for i in unnumbered], return_inverse=True)
+        name_rank[unnumbered] = ranks.reshape(-1)
+
+    curve_id = np.where(is_semi, arrays["curve_id"], 0)
+    curve_index = np.where(is_semi, arrays["curve_index"], 0)
+    return np.lexsort((curve_index, curve_id, name_rank, number, not_numbered, is_semi))
+
+
+def _landmark_sort_key(name):
+    try:
+        return int(name.split(".")[1])
+    except (ValueError, IndexError):
+        return name
+
+
+def write_pts_arrays(filepath, arrays, sort=True, compression=None, float_format="%.6e"):
+    """
+    Write point arrays (see landmark_data.POINT_FIELDS) to a .pts file, in
+    pts_order(), or in the order given when `sort` is False. `compression`
+    ('NONE', 'GZIP' or 'ZSTD') defaults to the one implied by the extension.
+    `float_format` is the %-format of each coordinate; "%r" writes the
+    shortest text that reads back as the exact same float64.
+    """
+    order = pts_order(arrays) if sort else np.arange(len(arrays["name"]))
+    names = arrays["name"]
+    co = np.asarray(arrays["co"], dtype=np.float64).reshape(-1, 3)[order]
+
+    with open_pts(filepath, 'w', compression) as f:
+        f.write("Version 1.0\n")
+        f.write(f"{len(order)}\n")
+        for start in range(0, len(order), _CHUNK_ROWS):
+            rows = order[start:start + _CHUNK_ROWS]
+            f.write(_format_rows([names[i] for i in rows], co[start:start + _CHUNK_ROWS], float_format))
+
+
+@contextlib.contextmanager
+def atomic_output(filepath):
+    """
+    Yield the path of a temporary file next to `filepath` to write instead.
+    It is renamed into place when the block completes and removed if the
+    block raises, so readers never see a half-written file.
+    """
+    directory, basename = os.path.split(filepath)
+    tmp_path = os.path.join(directory, f".{basename}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        yield tmp_path
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_pts_atomic(filepath, arrays):
+    """write_pts_arrays() through atomic_output()."""
+    with atomic_output(filepath) as tmp_path:
+        write_pts_arrays(tmp_path, arrays, compression=compression_from_extension(filepath))
+
+
+def _format_rows(names, co, float_format="%.6e"):
+    """'<name> <x> <y> <z>' lines for a block of rows, in one formatting pass."""
+    values = [None] * (len(names) * 4)
+    values[0::4] = names
+    values[1::4] = co[:, 0].tolist()
+    values[2::4] = co[:, 1].tolist()
+    values[3::4] = co[:, 2].tolist()
+    row = f"%s {float_format} {float_format} {float_format}\n"
+    return (row * len(names)) % tuple(values)
+
+
+def dicts_to_arrays(points):
+    """Inverse of pts_io.landmark_set_to_dicts: point dicts to the point arrays used by landmark_data."""
+    return {
+        "name": [p["name"] for p in points],
+        "co": np.array([p["co"] for p in points], dtype=np.float64).reshape(-1, 3),
+        "kind": np.array([KIND_SEMI if p["kind"] == 'SEMI' else KIND_LANDMARK for p in points], dtype=np.int32),
+        "curve_id": np.array([p["curve_id"] for p in points], dtype=np.int32),
+        "curve_index": np.array([p["curve_index"] for p in points], dtype=np.int32),
+    }
@@ -1,152 +1,161 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 """
-Import/export of the .pts landmark format:
-
-    Version 1.0
-    <point count>
-    S.1 <x> <y> <z>
-    ...
-    C.<curve>.<index> <x> <y> <z>
-    ...
-
-"S.N" rows are ordinary landmarks, "C.<curve>.<index>" rows are semilandmarks
-sampled along curve <curve>, in order. Both kinds are stored as plain points
-on a BlendMark landmark set (see core/landmark_data.py) and drawn as a
-viewport overlay only -- no mesh geometry is created.
+Import/export operators for the .pts landmark format. Parsing and writing
+live in pts_format.py, which scripts should import directly.
+Both landmarks and semilandmarks are stored as plain points on a BlendMark
+landmark set (see core/landmark_data.py) and drawn as a viewport overlay
+only -- no mesh geometry is created.
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import bpy
-from bpy.props import StringProperty
+import numpy as np
+from bpy.props import BoolProperty, CollectionProperty, EnumProperty, StringProperty
 from bpy.types import Operator
 from bpy_extras.io_utils import ExportHelper, ImportHelper
 
-from .utils import create_landmark_set, get_active_landmark_set, is_landmark_set
+from . import registry
+from .landmark_data import KIND_LANDMARK, KIND_SEMI, add_points, points_hash, read_points
+from .pts_format import HAS_ZSTD, PTS_EXTENSIONS, PTS_GLOB, parse_pts_arrays, pts_stem, write_pts_atomic
+from .utils import create_landmark_set, get_active_landmark_set
 
+# Threads formatting/writing files for "Export All".
+_EXPORT_WORKERS = min(8, os.cpu_count() or 1)
 
-class PtsParseError(Exception):
-    pass
 
+def _record_export(landmark_set, filepath, arrays):
+    # What was last written, and where, so "Export All" can skip unchanged sets.
+    landmark_set["blendmark_export_path"] = os.path.abspath(filepath)
+    landmark_set["blendmark_export_hash"] = points_hash(arrays)
 
-def parse_pts(filepath):
-    """Parse a .pts file into a list of dicts: name, x, y, z, kind, curve_id, curve_index."""
-    with open(filepath, 'r') as f:
-        lines = [line.strip() for line in f if line.strip()]
 
-    if not lines:
-        raise PtsParseError("File is empty")
-    if not lines[0].lower().startswith("version"):
-        raise PtsParseError(f"Expected a 'Version ...' header, found: '{lines[0]}'")
-
-    # lines[1] is the declared point count; trust the actual rows instead.
-    rows = lines[2:]
-
-    points = []
-    for line_no, line in enumerate(rows, start=3):
-        parts = line.split()
-        if len(parts) != 4:
-            raise PtsParseError(f"Line {line_no}: expected '<name> <x> <y> <z>', got: '{line}'")
-        name, x, y, z = parts
-        try:
-            x, y, z = float(x), float(y), float(z)
-        except ValueError:
-            raise PtsParseError(f"Line {line_no}: non-numeric coordinates in '{line}'")
-
-        if name.startswith("S."):
-            points.append({"name": name, "co": (x, y, z), "kind": 'LANDMARK', "curve_id": 0, "curve_index": 0})
-        elif name.startswith("C."):
-            name_parts = name.split(".")
-            if len(name_parts) != 3:
-                raise PtsParseError(f"Line {line_no}: malformed curve point name '{name}', expected 'C.<curve>.<index>'")
-            try:
-                curve_id, curve_index = int(name_parts[1]), int(name_parts[2])
-            except ValueError:
-                raise PtsParseError(f"Line {line_no}: curve/index in '{name}' must be numeric")
-            points.append({
-                "name": name, "co": (x, y, z), "kind": 'SEMI',
-                "curve_id": curve_id, "curve_index": curve_index,
-            })
-        else:
-            raise PtsParseError(f"Line {line_no}: point name '{name}' must start with 'S.' or 'C.'")
-
-    return points
-
-
-def write_pts(filepath, points):
-    """Write points (dicts with name/co/kind, as produced by landmark_set_to_dicts) to a .pts file."""
-    landmarks = sorted(
-        (p for p in points if p["kind"] == 'LANDMARK'),
-        key=lambda p: _landmark_sort_key(p["name"]),
+def _is_exported(landmark_set, filepath, arrays):
+    return (
+        landmark_set.get("blendmark_export_path") == os.path.abspath(filepath)
+        and landmark_set.get("blendmark_export_hash") == points_hash(arrays)
+        and os.path.isfile(filepath)
     )
-    semis = sorted(
-        (p for p in points if p["kind"] == 'SEMI'),
-        key=lambda p: (p["curve_id"], p["curve_index"]),
-    )
-    ordered = landmarks + semis
-
-    with open(filepath, 'w') as f:
-        f.write("Version 1.0\n")
-        f.write(f"{len(ordered)}\n")
-        for p in ordered:
-            x, y, z = p["co"]
-            f.write(f"{p['name']} {x:.6e} {y:.6e} {z:.6e}\n")
-
-
-def _landmark_sort_key(name):
-    try:
-        return int(name.split(".")[1])
-    except (ValueError, IndexError):
-        return name
 
 
 def landmark_set_to_dicts(landmark_set):
-    result = []
-    for p in landmark_set.blendmark_points:
-        result.append({
-            "name": p.point_name, "co": tuple(p.co), "kind": p.kind,
-            "curve_id": p.curve_id, "curve_index": p.curve_index,
-        })
-    return result
+    arrays = read_points(landmark_set)
+    return [
+        {
+            "name": name, "co": tuple(co), "kind": 'SEMI' if kind == KIND_SEMI else 'LANDMARK',
+            "curve_id": curve_id, "curve_index": curve_index,
+        }
+        for name, co, kind, curve_id, curve_index in zip(
+            arrays["name"], arrays["co"].astype(np.float64).tolist(), arrays["kind"].tolist(),
+            arrays["curve_id"].tolist(), arrays["curve_index"].tolist(),
+        )
+    ]
+
+
+def _batch_executor(file_count):
+    """
+    Pool for parsing several files at once. Threads rather than processes:
+    forking the multi-threaded Blender process can deadlock the children on
+    locks held at fork time, and spawned workers cannot import bpy. Only file
+    reads and gzip/zstd decompression release the GIL and overlap; the text
+    to array conversion of each file still runs one at a time.
+    """
+    return ThreadPoolExecutor(max_workers=max(1, min(file_count, os.cpu_count() or 1)))
+
+
+def parse_pts_batch(filepaths, progress=None):
+    """
+    Parse many .pts files concurrently with parse_pts_arrays. Returns a list of
+    (filepath, arrays, error) in the order given, where exactly one of arrays
+    and error (the exception parsing that file raised, usually a PtsParseError
+    or OSError) is None, so one bad file never stops the rest. `progress(done)`
+    is called as files complete.
+    """
+    def parsed(filepath, future_or_none):
+        try:
+            arrays = future_or_none.result() if future_or_none is not None else parse_pts_arrays(filepath)
+        except Exception as exc:
+            return None, exc
+        return arrays, None
+
+    results = {}
+    if len(filepaths) == 1:
+        results[filepaths[0]] = parsed(filepaths[0], None)
+        if progress is not None:
+            progress(1)
+    else:
+        with _batch_executor(len(filepaths)) as pool:
+            futures = {pool.submit(parse_pts_arrays, filepath): filepath for filepath in filepaths}
+            for done, future in enumerate(as_completed(futures), start=1):
+                results[futures[future]] = parsed(futures[future], future)
+                if progress is not None:
+                    progress(done)
+    return [(filepath,) + results[filepath] for filepath in filepaths]
 
 
 class VIEW3D_OT_BlendMark_ImportPTSOperator(Operator, ImportHelper):
     bl_idname = "view3d.blendmark_import_pts"
     bl_label = "Import .pts"
     bl_options = {'REGISTER', 'UNDO'}
-    bl_description = "Import landmarks/semilandmarks from a .pts file as a viewport overlay (no mesh is created)"
+    bl_description = (
+        "Import landmarks/semilandmarks from one or more .pts files as viewport overlays "
+        "(no mesh is created). Select several files to load a whole study at once"
+    )
 
     filename_ext = ".pts"
-    filter_glob: StringProperty(default="*.pts", options={'HIDDEN'})
+    filter_glob: StringProperty(default=PTS_GLOB, options={'HIDDEN'})
+    files: CollectionProperty(type=bpy.types.OperatorFileListElement, options={'HIDDEN', 'SKIP_SAVE'})
+    directory: StringProperty(subtype='DIR_PATH', options={'HIDDEN', 'SKIP_SAVE'})
+
+    def _filepaths(self):
+        names = [f.name for f in self.files if f.name]
+        if names and self.directory:
+            return [os.path.join(self.directory, name) for name in names]
+        return [self.filepath]
 
     def execute(self, context):
+        filepaths = self._filepaths()
+        wm = context.window_manager
+        wm.progress_begin(0, len(filepaths))
         try:
-            parsed = parse_pts(self.filepath)
-        except (PtsParseError, OSError) as exc:
-            self.report({'ERROR'}, f"Could not import '{self.filepath}': {exc}")
-            return {'CANCELLED'}
+            results = parse_pts_batch(filepaths, progress=wm.progress_update)
+        finally:
+            wm.progress_end()
 
+        # Landmark sets can only be created on the main thread, once parsing is done.
         target = context.scene.blendmark_target_object
-        name = os.path.splitext(os.path.basename(self.filepath))[0]
-        landmark_set = create_landmark_set(context, name, target_object=target)
-
-        for p in parsed:
-            point = landmark_set.blendmark_points.add()
-            point.point_name = p["name"]
-            point.co = p["co"]
-            point.kind = p["kind"]
-            point.curve_id = p["curve_id"]
-            point.curve_index = p["curve_index"]
-
-        context.view_layer.objects.active = landmark_set
+        imported, errors = [], []
+        n_landmarks = n_semi = 0
+        for filepath, parsed, error in results:
+            if error is not None:
+                errors.append(f"'{filepath}': {error}")
+                continue
+            landmark_set = create_landmark_set(context, pts_stem(filepath), target_object=target)
+            add_points(landmark_set, parsed)
+            imported.append(landmark_set)
+            landmarks = int(np.count_nonzero(parsed["kind"] == KIND_LANDMARK))
+            n_landmarks += landmarks
+            n_semi += len(parsed["name"]) - landmarks
+
+        if not imported:
+            self.report({'ERROR'}, f"Could not import {errors[0]}" if len(errors) == 1 else
+                        f"Could not import any of the {len(errors)} files: {errors[0]}")
+            return {'CANCELLED'}
+
         for obj in context.selected_objects:
             obj.select_set(False)
-        landmark_set.select_set(True)
-
-        n_landmarks = sum(1 for p in parsed if p["kind"] == 'LANDMARK')
-        n_semi = len(parsed) - n_landmarks
-        self.report({'INFO'}, f"Imported {n_landmarks} landmarks and {n_semi} semilandmarks into '{name}'")
+        for landmark_set in imported:
+            landmark_set.select_set(True)
+        context.view_layer.objects.active = imported[-1]
+
+        for error in errors:
+            self.report({'WARNING'}, f"Could not import {error}")
+        into = f"'{imported[0].name}'" if len(imported) == 1 else f"{len(imported)} landmark sets"
+        failed = f", {len(errors)} file(s) failed (see Info log)" if errors else ""
+        self.report({'WARNING'} if errors else {'INFO'},
+                    f"Imported {n_landmarks} landmarks and {n_semi} semilandmarks into {into}{failed}")
         return {'FINISHED'}
 
 
@@ -157,14 +166,35 @@ class VIEW3D_OT_BlendMark_ExportPTSOperator(Operator, ExportHelper):
     bl_description = "Export the active landmark set's landmarks/semilandmarks to a .pts file"
 
     filename_ext = ".pts"
-    filter_glob: StringProperty(default="*.pts", options={'HIDDEN'})
+    filter_glob: StringProperty(default=PTS_GLOB, options={'HIDDEN'})
+
+    compression: EnumProperty(
+        name="Compression",
+        items=[
+            ('NONE', "None", "Plain text .pts"),
+            ('GZIP', "Gzip", "Gzip compressed .pts.gz"),
+        ] + ([('ZSTD', "Zstd", "Zstandard compressed .pts.zst")] if HAS_ZSTD else []),
+        default='NONE',
+    )
+
+    def check(self, context):
+        # ExportHelper.check() only swaps the last extension, not ".pts.gz".
+        directory, name = os.path.split(self.filepath)
+        if not name:
+            return False
+        filepath = os.path.join(directory, pts_stem(name) + PTS_EXTENSIONS[self.compression])
+        if filepath == self.filepath:
+            return False
+        self.filepath = filepath
+        return True
 
     def invoke(self, context, event):
         landmark_set = get_active_landmark_set(context)
         if landmark_set is None:
             self.report({'ERROR'}, "Active object is not a BlendMark landmark set")
             return {'CANCELLED'}
-        self.filepath = f"{landmark_set.name}.pts"
+        self.filename_ext = PTS_EXTENSIONS[self.compression]
+        self.filepath = f"{landmark_set.name}{self.filename_ext}"
         return super().invoke(context, event)
 
     def execute(self, context):
@@ -176,7 +206,9 @@ class VIEW3D_OT_BlendMark_ExportPTSOperator(Operator, ExportHelper):
             self.report({'WARNING'}, "Landmark set is empty, nothing to export")
             return {'CANCELLED'}
 
-        write_pts(self.filepath, landmark_set_to_dicts(landmark_set))
+        arrays = read_points(landmark_set)
+        write_pts_atomic(self.filepath, arrays)
+        _record_export(landmark_set, self.filepath, arrays)
         self.report({'INFO'}, f"Exported {len(landmark_set.blendmark_points)} points to '{self.filepath}'")
         return {'FINISHED'}
 
@@ -185,7 +217,17 @@ class VIEW3D_OT_BlendMark_ExportAllPTSOperator(Operator):
     bl_idname = "view3d.blendmark_export_all_pts"
     bl_label = "Export All Landmark Sets (.pts)"
     bl_options = {'REGISTER', 'UNDO'}
-    bl_description = "Export every landmark set in the scene to <selected folder>/<set name>.pts"
+    bl_description = (
+        "Export every landmark set in the scene to <selected folder>/<set name>.pts. "
+        "Sets unchanged since they were last written there are skipped"
+    )
+
+    force: BoolProperty(
+        name="Force",
+        description="Rewrite every file, even for sets that did not change since their last export",
+        default=False,
+        options={'SKIP_SAVE'},
+    )
 
     def execute(self, context):
         folder = context.scene.selected_folder
@@ -194,18 +236,62 @@ class VIEW3D_OT_BlendMark_ExportAllPTSOperator(Operator):
             return {'CANCELLED'}
 
         out_dir = folder if os.path.isdir(folder) else os.path.dirname(folder)
-        exported = 0
-        for obj in bpy.data.objects:
-            if not is_landmark_set(obj) or len(obj.blendmark_points) == 0:
+
+        # Point data can only be read on the main thread: snapshot it here and
+        # leave formatting and (possibly slow, networked) writes to the pool.
+        jobs, skipped = [], 0
+        for obj in registry.landmark_sets():
+            if len(obj.blendmark_points) == 0:
                 continue
             filepath = os.path.join(out_dir, f"{obj.name}.pts")
-            write_pts(filepath, landmark_set_to_dicts(obj))
-            exported += 1
-
-        if exported == 0:
-            self.report({'WARNING'}, "No non-empty landmark sets found to export")
+            arrays = read_points(obj)
+            if not self.force and _is_exported(obj, filepath, arrays):
+                skipped += 1
+                continue
+            jobs.append((obj, filepath, arrays))
+
+        if not jobs:
+            if skipped:
+                self.report({'INFO'}, f"All {skipped} landmark set(s) are already up to date in '{out_dir}'")
+            else:
+                self.report({'WARNING'}, "No non-empty landmark sets found to export")
+            return {'FINISHED'}
+
+        errors = []
+        wm = context.window_manager
+        wm.progress_begin(0, len(jobs))
+        try:
+            with ThreadPoolExecutor(max_workers=min(len(jobs), _EXPORT_WORKERS)) as pool:
+                futures = {
+                    pool.submit(write_pts_atomic, filepath, arrays): (obj, filepath, arrays)
+                    for obj, filepath, arrays in jobs
+                }
+                for done, future in enumerate(as_completed(futures), start=1):
+                    obj, filepath, arrays = futures[future]
+                    try:
+                        future.result()
+                    except Exception as exc:
+                        # Collected per set: the others may already be written.
+                        errors.append(f"{obj.name}: {exc}")
+                    else:
+                        _record_export(obj, filepath, arrays)
+                    wm.progress_update(done)
+        finally:
+            wm.progress_end()
+
+        exported = len(jobs) - len(errors)
+        unchanged = f", {skipped} unchanged skipped" if skipped else ""
+        if errors:
+            # One line per failure in the Info log, then the summary.
+            for error in errors:
+                self.report({'WARNING'}, f"Export failed for {error}")
+            self.report(
+                {'WARNING'},
+                f"Exported {exported} of {len(jobs)} landmark set(s) to '{out_dir}'{unchanged}, "
+                f"{len(errors)} failed (see Info log)",
+            )
         else:
-            self.report({'INFO'}, f"Exported {exported} landmark set(s) to '{out_dir}'")
+            self.report({'INFO'}, f"Exported {exported} landmark set(s) to '{out_dir}'{unchanged}")
         return {'FINISHED'}
 
 
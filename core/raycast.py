@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Ray casting against the target mesh through a cached BVH tree.
+
+Evaluating the depsgraph and ray casting the evaluated object for every mouse
+sample is far too slow on multi-million triangle surface scans. Instead a
+BVHTree is built once per target, in object-local space so moving/rotating
+the target does not invalidate it, and is only thrown away when a depsgraph
+update reports that the target's geometry actually changed.
+
+For very dense specimens the interactive tools can opt into a decimated
+"proxy" of the target for hover/drag/stroke previews, and snap the final
+result back onto the full-resolution surface on release (see
+utils.snap_to_target). Snapping looks for the nearest point in world space,
+which the local-space tree only gives under uniform scale: non-uniformly
+scaled targets get a world-space tree for it, rebuilt when they move.
+"""
+
+import bpy
+import numpy as np
+from bpy.app.handlers import persistent
+from mathutils.bvhtree import BVHTree
+
+# Object session_uid -> BVHTree of its evaluated geometry, in local space.
+_trees = {}
+# Object session_uid -> (face budget, BVHTree of a decimated copy), local space.
+_proxies = {}
+# Object session_uid -> (matrix_world, BVHTree in world space), for snapping
+# onto non-uniformly scaled objects only (see nearest_world).
+_world_trees = {}
+
+
+def target_bvh(target):
+    """BVH tree of `target`'s evaluated mesh in object-local space, built on first use."""
+    key = target.session_uid
+    tree = _trees.get(key)
+    if tree is None:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        tree = _trees[key] = BVHTree.FromObject(target, depsgraph)
+    return tree
+
+
+def _evaluated_triangles(target):
+    """Vertex positions (V, 3) and triangle vertex indices (T, 3) of `target`'s evaluated mesh."""
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    evaluated = target.evaluated_get(depsgraph)
+    mesh = evaluated.to_mesh()
+    try:
+        mesh.calc_loop_triangles()
+        co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        tris = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+        mesh.vertices.foreach_get("co", co)
+        mesh.loop_triangles.foreach_get("vertices", tris)
+    finally:
+        evaluated.to_mesh_clear()
+    return co.reshape(-1, 3).astype(np.float64), tris.reshape(-1, 3)
+
+
+def _cluster_decimate(co, tris, max_faces):
+    """
+    Vertex-clustering decimation: snap vertices to a uniform grid sized so the
+    surface ends up with roughly `max_faces` triangles, merge each cell into
+    its vertex average and drop the triangles that collapse.
+    """
+    a, b, c = co[tris[:, 0]], co[tris[:, 1]], co[tris[:, 2]]
+    area = 0.5 * np.linalg.norm(np.cross(b - a, c - a), axis=1).sum()
+    # A triangulated surface has about half as many vertices as faces, and
+    # each occupied cell becomes one vertex.
+    cell = np.sqrt(area / max(max_faces / 2.0, 1.0))
+    if cell <= 0.0:
+        return co, tris
+
+    cells = np.floor((co - co.min(axis=0)) / cell).astype(np.int64)
+    keys = (cells[:, 0] << 42) | (cells[:, 1] << 21) | cells[:, 2]
+    _unique, cluster = np.unique(keys, return_inverse=True)
+    cluster = cluster.reshape(-1)
+    counts = np.bincount(cluster).astype(np.float64)
+    merged = np.column_stack([np.bincount(cluster, weights=co[:, axis]) / counts for axis in range(3)])
+
+    tris = cluster[tris]
+    keep = (tris[:, 0] != tris[:, 1]) & (tris[:, 1] != tris[:, 2]) & (tris[:, 0] != tris[:, 2])
+    tris = np.unique(np.sort(tris[keep], axis=1), axis=0)
+    return merged, tris
+
+
+def proxy_bvh(target, max_faces):
+    """
+    BVH tree of a decimated copy of `target` (about `max_faces` triangles), in
+    object-local space. Falls back to the full tree when the mesh is already
+    that light.
+    """
+    key = target.session_uid
+    cached = _proxies.get(key)
+    if cached is not None and cached[0] == max_faces:
+        return cached[1]
+
+    co, tris = _evaluated_triangles(target)
+    if len(tris) <= max_faces:
+        tree = target_bvh(target)
+    else:
+        co, tris = _cluster_decimate(co, tris, max_faces)
+        tree = BVHTree.FromPolygons(co.tolist(), tris.tolist(), all_triangles=True)
+    _proxies[key] = (max_faces, tree)
+    return tree
+
+
+def ray_cast_local(target, local_origin, local_direction, proxy_faces=0):
+    """
+    Ray-cast `target` in its local space. Returns the local-space hit location,
+    or None when the ray misses. With `proxy_faces` > 0 the decimated proxy of
+    that size is hit instead of the full-resolution surface.
+    """
+    tree = proxy_bvh(target, proxy_faces) if proxy_faces > 0 else target_bvh(target)
+    location, _normal, _index, _distance = tree.ray_cast(local_origin, local_direction)
+    return location
+
+
+def nearest_local(target, local_co):
+    """Closest point to `local_co` on `target`'s full-resolution surface, in local space."""
+    location, _normal, _index, _distance = target_bvh(target).find_nearest(local_co)
+    return location
+
+
+def _scales_evenly(matrix):
+    """True when `matrix` scales every direction alike (no non-uniform scale or shear)."""
+    linear = np.array(matrix.to_3x3(), dtype=np.float64)
+    gram = linear.T @ linear
+    scale = np.trace(gram) / 3.0
+    return np.allclose(gram, scale * np.eye(3), rtol=0.0, atol=1e-6 * scale)
+
+
+def nearest_world(target, world_co):
+    """
+    Closest point to `world_co` on `target`'s full-resolution surface, in
+    world space, or None. Distances only map evenly between local and world
+    space under uniform scale, so otherwise a world-space tree is searched.
+    """
+    matrix = target.matrix_world
+    if _scales_evenly(matrix):
+        location = nearest_local(target, matrix.inverted() @ world_co)
+        return matrix @ location if location is not None else None
+
+    key = target.session_uid
+    matrix_key = tuple(tuple(row) for row in matrix)
+    cached = _world_trees.get(key)
+    if cached is None or cached[0] != matrix_key:
+        co, tris = _evaluated_triangles(target)
+        transform = np.array(matrix, dtype=np.float64)
+        world = co @ transform[:3, :3].T + transform[:3, 3]
+        cached = _world_trees[key] = (matrix_key, BVHTree.FromPolygons(world.tolist(), tris.tolist(), all_triangles=True))
+    location, _normal, _index, _distance = cached[1].find_nearest(world_co)
+    return location
+
+
+def invalidate(target=None):
+    """Drop the cached trees of `target`, or of every object when None."""
+    if target is None:
+        _trees.clear()
+        _proxies.clear()
+        _world_trees.clear()
+    else:
+        _trees.pop(target.session_uid, None)
+        _proxies.pop(target.session_uid, None)
+        _world_trees.pop(target.session_uid, None)
+
+
+@persistent
+def _on_depsgraph_update(_scene, depsgraph):
+    if not _trees and not _proxies and not _world_trees:
+        return
+    for update in depsgraph.updates:
+        if update.is_updated_geometry and isinstance(update.id, bpy.types.Object):
+            invalidate(update.id.original)
+
+
+@persistent
+def _on_data_replaced(*_args):
+    invalidate()
+
+
+def register():
+    bpy.app.handlers.depsgraph_update_post.append(_on_depsgraph_update)
+    for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post, bpy.app.handlers.load_post):
+        handlers.append(_on_data_replaced)
+
+
+def unregister():
+    for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post, bpy.app.handlers.load_post):
+        if _on_data_replaced in handlers:
+            handlers.remove(_on_data_replaced)
+    if _on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_on_depsgraph_update)
+    invalidate()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Registry of the landmark sets in the file, and of the sets placed on each
+target, so nothing has to scan every object to find them.
+
+Walking bpy.data.objects (or the visible objects, every frame) and looking
+up an ID property on each gets expensive in files with thousands of imported
+fragments. Instead the sets are collected once and the result is reused:
+create_landmark_set() adds new sets as they are made, while anything that
+can add, remove or replace objects behind our back (loading a file,
+undo/redo, deleting or duplicating objects, changing a set's target) makes
+the registry stale, and it is rebuilt on the next lookup.
+"""
+
+import bpy
+from bpy.app.handlers import persistent
+
+# session_uid -> landmark set, or None while the registry is stale.
+_sets = None
+# session_uid of a target (0 for sets without one) -> [landmark set, ...]
+_by_target = {}
+# len(bpy.data.objects) when _sets was last known to be complete.
+_object_count = -1
+
+
+def is_landmark_set(obj):
+    return bool(obj) and obj.get("blendmark_is_set", False)
+
+
+def _target_key(landmark_set):
+    target = landmark_set.blendmark_target
+    return target.session_uid if target is not None else 0
+
+
+def _insert(landmark_set):
+    _sets[landmark_set.session_uid] = landmark_set
+    _by_target.setdefault(_target_key(landmark_set), []).append(landmark_set)
+
+
+def _rebuild():
+    global _sets, _object_count
+    _sets = {}
+    _by_target.clear()
+    for obj in bpy.data.objects:
+        if is_landmark_set(obj):
+            _insert(obj)
+    _object_count = len(bpy.data.objects)
+
+
+def _current():
+    # Objects added or removed without the registry being told (e.g. by
+    # scripts, before any depsgraph update) change the object count.
+    if _sets is None or len(bpy.data.objects) != _object_count:
+        _rebuild()
+
+
+def _lookup(get):
+    """Registered sets from `get()`, as a list, rescanning if any was freed meanwhile."""
+    _current()
+    sets = list(get())
+    try:
+        for obj in sets:
+            obj.name  # raises ReferenceError once the object is gone
+    except ReferenceError:
+        _rebuild()
+        sets = list(get())
+    return sets
+
+
+def invalidate():
+    """Forget every registered set; the next lookup rescans the file."""
+    global _sets
+    _sets = None
+
+
+def add(landmark_set):
+    """Register a newly created landmark set (see utils.create_landmark_set)."""
+    global _object_count
+    if _sets is None or len(bpy.data.objects) != _object_count + 1:
+        # Something else changed too: let the next lookup rescan.
+        invalidate()
+        return
+    _insert(landmark_set)
+    _object_count += 1
+
+
+def target_changed(landmark_set):
+    """A set's target was reassigned: re-index, unless it is not registered (yet)."""
+    if _sets is not None and landmark_set.session_uid in _sets:
+        invalidate()
+
+
+def landmark_sets():
+    """Every landmark set in the file."""
+    return _lookup(lambda: _sets.values())
+
+
+def sets_for_target(target):
+    """The landmark sets placed on `target`."""
+    key = target.session_uid
+    return _lookup(lambda: _by_target.get(key, ()))
+
+
+@persistent
+def _on_depsgraph_update(_scene, depsgraph):
+    if _sets is None:
+        return
+    if len(bpy.data.objects) != _object_count:
+        invalidate()
+        return
+    # An object deleted and another added in the same step keep the count:
+    # catch landmark sets (e.g. duplicates) the registry has not seen.
+    for update in depsgraph.updates:
+        obj = update.id
+        if isinstance(obj, bpy.types.Object):
+            obj = obj.original
+            if obj.session_uid not in _sets and is_landmark_set(obj):
+                invalidate()
+                return
+
+
+@persistent
+def _on_data_replaced(*_args):
+    invalidate()
+
+
+def register():
+    bpy.app.handlers.depsgraph_update_post.append(_on_depsgraph_update)
+    for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post, bpy.app.handlers.load_post):
+        handlers.append(_on_data_replaced)
+
+
+def unregister():
+    for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post, bpy.app.handlers.load_post):
+        if _on_data_replaced in handlers:
+            handlers.remove(_on_data_replaced)
+    if _on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_on_depsgraph_update)
+    invalidate()
@@ -1,15 +1,21 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 """
-Shared helpers for the BlendMark add-on: naming, target picking and the
-polyline resampling used to build semilandmark curves.
+Shared helpers for the BlendMark add-on: landmark set discovery, target
+picking, screen projection and the polyline resampling used to build
+semilandmark curves.
 """
 
 import bpy
+import numpy as np
 from mathutils import Vector
 from mathutils.geometry import intersect_line_plane
 from bpy_extras.view3d_utils import region_2d_to_origin_3d, region_2d_to_vector_3d
 
+from . import registry
+from .raycast import nearest_world, ray_cast_local
+from .registry import is_landmark_set
+
 RAY_LENGTH = 1.0e6
 
 
@@ -25,10 +31,6 @@ def ensure_landmarks_collection():
     return collection
 
 
-def is_landmark_set(obj):
-    return bool(obj) and obj.get("blendmark_is_set", False)
-
-
 def is_valid_target(obj):
     """Objects that can be digitized: meshes, and empties displaying an image."""
     if obj is None:
@@ -53,34 +55,10 @@ def create_landmark_set(context, name, target_object=None):
     empty["blendmark_is_set"] = True
     empty.blendmark_target = target_object
     collection.objects.link(empty)
+    registry.add(empty)
     return empty
 
 
-# ---------------------------------------------------------------------------
-# Point naming
-# ---------------------------------------------------------------------------
-
-def _existing_landmark_indices(landmark_set):
-    indices = []
-    for p in landmark_set.blendmark_points:
-        if p.kind == 'LANDMARK' and p.point_name.startswith("S."):
-            try:
-                indices.append(int(p.point_name.split(".")[1]))
-            except (ValueError, IndexError):
-                pass
-    return indices
-
-
-def next_landmark_name(landmark_set):
-    indices = _existing_landmark_indices(landmark_set)
-    return f"S.{(max(indices) + 1) if indices else 1}"
-
-
-def next_curve_id(landmark_set):
-    ids = [p.curve_id for p in landmark_set.blendmark_points if p.kind == 'SEMI']
-    return (max(ids) + 1) if ids else 1
-
-
 # ---------------------------------------------------------------------------
 # Picking a point ON the target object
 # ---------------------------------------------------------------------------
@@ -105,15 +83,19 @@ def _image_empty_bounds(target):
     return x0, x0 + size_x, y0, y0 + size_y
 
 
-def pick_target_point(target, region, rv3d, coord):
+def pick_target_point(target, region, rv3d, coord, proxy_faces=0):
     """
     Ray-cast the mouse position against `target` only and return the world-space
     hit as a Vector, or None when the ray misses it.
 
-    Meshes are ray-cast against their evaluated geometry; image empties are
-    intersected with their own plane and clipped to the image rectangle. Nothing
-    else in the scene can capture the ray, so landmarks can only ever land on
-    the object being digitized.
+    `proxy_faces` > 0 hits a decimated copy of a mesh target instead (see
+    raycast.proxy_bvh); use it for live previews only and snap_to_target()
+    the final result.
+
+    Meshes are ray-cast against a cached BVH tree of their evaluated geometry
+    (see raycast.py); image empties are intersected with their own plane and
+    clipped to the image rectangle. Nothing else in the scene can capture the
+    ray, so landmarks can only ever land on the object being digitized.
     """
     if not is_valid_target(target):
         return None
@@ -126,13 +108,11 @@ def pick_target_point(target, region, rv3d, coord):
     matrix_inv = target.matrix_world.inverted()
 
     if target.type == 'MESH':
-        depsgraph = bpy.context.evaluated_depsgraph_get()
-        evaluated = target.evaluated_get(depsgraph)
         local_origin = matrix_inv @ origin
         local_direction = (matrix_inv.to_3x3() @ direction).normalized()
 
-        success, location, _normal, _index = evaluated.ray_cast(local_origin, local_direction)
-        if not success:
+        location = ray_cast_local(target, local_origin, local_direction, proxy_faces=proxy_faces)
+        if location is None:
             return None
         return target.matrix_world @ location
 
@@ -153,6 +133,137 @@ def pick_target_point(target, region, rv3d, coord):
     return hit
 
 
+def snap_to_target(target, co):
+    """
+    Move a world-space point onto the closest spot of `target`'s
+    full-resolution surface. Image empties are hit exactly already, so their
+    points are returned unchanged.
+    """
+    if target.type != 'MESH':
+        return Vector(co)
+    location = nearest_world(target, Vector(co))
+    return location if location is not None else Vector(co)
+
+
+# ---------------------------------------------------------------------------
+# Projecting points to the screen
+# ---------------------------------------------------------------------------
+
+def view_key(region, rv3d):
+    """Hashable snapshot of a view: screen projections stay valid while it is unchanged."""
+    return (tuple(tuple(row) for row in rv3d.perspective_matrix), region.width, region.height)
+
+
+def project_points(region, rv3d, coords):
+    """
+    Vectorized location_3d_to_region_2d: project an (N, 3) array of world-space
+    points into `region` pixel coordinates with a single matrix product.
+
+    Returns (screen, visible): an (N, 2) float64 array and an (N,) bool mask
+    that is False for points behind the viewer, whose screen position is
+    meaningless (location_3d_to_region_2d returns None for those).
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+    matrix = np.array(rv3d.perspective_matrix, dtype=np.float64)
+    clip = coords @ matrix[:, :3].T + matrix[:, 3]
+
+    w = clip[:, 3]
+    visible = w > 0.0
+    w = np.where(visible, w, 1.0)
+
+    half_width = region.width / 2.0
+    half_height = region.height / 2.0
+    screen = np.empty((len(coords), 2), dtype=np.float64)
+    screen[:, 0] = half_width + half_width * clip[:, 0] / w
+    screen[:, 1] = half_height + half_height * clip[:, 1] / w
+    return screen, visible
+
+
+# The 8 corners of a box, as (use max?) flags per axis.
+_BOX_CORNERS = np.array([[(i >> axis) & 1 for axis in range(3)] for i in range(8)], dtype=bool)
+
+
+def boxes_in_view(region, rv3d, box_min, box_max, margin_px=0.0):
+    """
+    Conservative view-frustum test of (B, 3) world-space axis-aligned boxes:
+    False only for boxes certainly off screen, i.e. whose 8 corners are all
+    behind the viewer or all beyond the same side of the region (widened by
+    `margin_px`). Near/far clipping is not applied, matching project_points.
+    """
+    box_min = np.asarray(box_min, dtype=np.float64).reshape(-1, 3)
+    box_max = np.asarray(box_max, dtype=np.float64).reshape(-1, 3)
+    corners = np.where(_BOX_CORNERS[None, :, :], box_max[:, None, :], box_min[:, None, :])
+    matrix = np.array(rv3d.perspective_matrix, dtype=np.float64)
+    clip = corners @ matrix[:, :3].T + matrix[:, 3]
+
+    x, y, w = clip[..., 0], clip[..., 1], clip[..., 3]
+    # Normalized device coordinates span [-1, 1] over the region.
+    wx = w * (1.0 + 2.0 * margin_px / max(region.width, 1))
+    wy = w * (1.0 + 2.0 * margin_px / max(region.height, 1))
+    # Each side plane is a half-space through the eye: a box entirely beyond
+    # one of them (or entirely behind the viewer) has nothing to show.
+    outside = (
+        (w <= 0.0).all(axis=1)
+        | (x < -wx).all(axis=1) | (x > wx).all(axis=1)
+        | (y < -wy).all(axis=1) | (y > wy).all(axis=1)
+    )
+    return ~outside
+
+
+class ScreenPointGrid:
+    """
+    Uniform screen-space grid over projected points, for hit-testing the
+    pointer without measuring every point of the set.
+
+    Only points that are in front of the viewer and within `cell_size` pixels
+    of the region are indexed. Cells are stored as a sorted array of packed
+    (column, row) keys, so both building and querying stay inside NumPy.
+    """
+
+    def __init__(self, screen, visible, region_size, cell_size):
+        width, height = region_size
+        self.screen = screen
+        self.cell_size = float(cell_size)
+        inside = (
+            visible
+            & (screen[:, 0] > -cell_size) & (screen[:, 0] < width + cell_size)
+            & (screen[:, 1] > -cell_size) & (screen[:, 1] < height + cell_size)
+        )
+        indices = np.flatnonzero(inside)
+        keys = self._keys(screen[indices])
+        order = np.argsort(keys, kind='stable')
+        self.indices = indices[order]
+        self.cell_keys, self.cell_starts = np.unique(keys[order], return_index=True)
+        self.cell_ends = np.append(self.cell_starts[1:], len(self.indices))
+
+    def _keys(self, coords):
+        # Offset by one cell so the margin around the region stays non-negative.
+        cells = np.floor(coords / self.cell_size).astype(np.int64) + 1
+        return (cells[:, 0] << 32) | cells[:, 1]
+
+    def nearest(self, coord, max_dist):
+        """Index of the point closest to `coord` within `max_dist` pixels, or -1."""
+        x, y = coord
+        reach = int(np.ceil(max_dist / self.cell_size))
+        offsets = np.arange(-reach, reach + 1) * self.cell_size
+        probes = np.array([(x + dx, y + dy) for dx in offsets for dy in offsets])
+        probe_keys = self._keys(probes)
+
+        slots = np.searchsorted(self.cell_keys, probe_keys)
+        slots = slots[slots < len(self.cell_keys)]
+        slots = slots[np.isin(self.cell_keys[slots], probe_keys)]
+        if len(slots) == 0:
+            return -1
+
+        candidates = np.concatenate([
+            self.indices[start:end] for start, end in zip(self.cell_starts[slots], self.cell_ends[slots])
+        ])
+        candidates.sort()  # lowest index wins ties, like a linear scan would
+        dist = np.hypot(self.screen[candidates, 0] - x, self.screen[candidates, 1] - y)
+        best = int(np.argmin(dist))
+        return int(candidates[best]) if dist[best] < max_dist else -1
+
+
 # ---------------------------------------------------------------------------
 # Edge-path ordering and resampling (semilandmark curves)
 # ---------------------------------------------------------------------------
@@ -206,31 +317,84 @@ def order_selected_edge_path(bm):
     return ordered
 
 
+def _polyline_coords(points):
+    """(V, 3) float64 array of a polyline given as Vectors, tuples or an array."""
+    return np.asarray(points, dtype=np.float64).reshape(-1, 3)
+
+
+def _resample(co, starts, counts, ns):
+    """
+    Arc-length resampling of the polylines packed into `co`: polyline k has
+    `counts[k]` vertices from row `starts[k]` and is resampled into `ns[k]`
+    points. Callers have already checked every polyline is resamplable.
+
+    Target distances along each polyline are located among the cumulative
+    segment lengths of all polylines with a single searchsorted, and every
+    output point is interpolated at once.
+    """
+    lengths = np.linalg.norm(np.diff(co, axis=0), axis=1)
+    # Segment s joins vertices s and s + 1; the last vertex of one polyline and
+    # the first of the next are no segment, so zero those "joins" out.
+    ends = starts + counts - 1
+    lengths[ends[:-1]] = 0.0
+    cumulative = np.concatenate(([0.0], np.cumsum(lengths)))
+    totals = cumulative[ends] - cumulative[starts]
+
+    curve = np.repeat(np.arange(len(ns)), ns)
+    sample = np.arange(len(curve)) - np.repeat(np.cumsum(ns) - ns, ns)
+    distance = totals[curve] / (ns[curve] - 1) * sample
+    # The first segment ending at or beyond the target distance, as the old
+    # segment walk picked it, kept within its own polyline.
+    seg = np.searchsorted(cumulative[1:], cumulative[starts[curve]] + distance, side='left')
+    seg = np.clip(seg, starts[curve], ends[curve] - 1)
+
+    seg_len = lengths[seg]
+    along = distance - (cumulative[seg] - cumulative[starts[curve]])
+    t = np.divide(along, seg_len, out=np.zeros_like(along), where=seg_len > 0.0)
+    result = co[seg] + (co[seg + 1] - co[seg]) * t[:, None]
+
+    # Both ends land exactly on the polyline's end points.
+    first = np.cumsum(ns) - ns
+    result[first] = co[starts]
+    result[first + ns - 1] = co[ends]
+    return result
+
+
 def resample_polyline(points, n):
-    """Resample a polyline (list of Vector) into n equally arc-length-spaced points."""
+    """
+    Resample a polyline (Vectors or an (V, 3) array) into n equally
+    arc-length-spaced points, returned as an (n, 3) float64 array.
+    """
     if n < 2:
         raise ValueError("Need at least 2 semilandmarks")
-    if len(points) < 2:
+    co = _polyline_coords(points)
+    if len(co) < 2:
         raise ValueError("Path needs at least 2 vertices")
-
-    segment_lengths = [(points[i + 1] - points[i]).length for i in range(len(points) - 1)]
-    total_length = sum(segment_lengths)
-    if total_length <= 0.0:
+    if np.linalg.norm(np.diff(co, axis=0), axis=1).sum() <= 0.0:
         raise ValueError("Selected path has zero length")
+    return _resample(co, np.array([0]), np.array([len(co)]), np.array([n]))
 
-    step = total_length / (n - 1)
-    result = [points[0].copy()]
-
-    seg_index = 0
-    seg_start_dist = 0.0
-    for i in range(1, n - 1):
-        target_dist = step * i
-        while seg_index < len(segment_lengths) and seg_start_dist + segment_lengths[seg_index] < target_dist:
-            seg_start_dist += segment_lengths[seg_index]
-            seg_index += 1
-        seg_len = segment_lengths[seg_index]
-        t = 0.0 if seg_len == 0 else (target_dist - seg_start_dist) / seg_len
-        result.append(points[seg_index].lerp(points[seg_index + 1], t))
-
-    result.append(points[-1].copy())
-    return result
+
+def resample_polylines(polylines, counts):
+    """
+    Batch resample_polyline: resample each polyline into its own number of
+    points (`counts`, one per polyline, or a single int for all) in one
+    vectorized pass. Returns a list of (n, 3) float64 arrays, in order.
+    Raises ValueError naming the first polyline that cannot be resampled.
+    """
+    coords = [_polyline_coords(points) for points in polylines]
+    if not coords:
+        return []
+    ns = np.broadcast_to(np.asarray(counts, dtype=np.int64), (len(coords),)).copy()
+    for k, (co, n) in enumerate(zip(coords, ns.tolist())):
+        if n < 2:
+            raise ValueError(f"Polyline {k}: need at least 2 points")
+        if len(co) < 2:
+            raise ValueError(f"Polyline {k}: needs at least 2 vertices")
+        if np.linalg.norm(np.diff(co, axis=0), axis=1).sum() <= 0.0:
+            raise ValueError(f"Polyline {k}: has zero length")
+
+    vertex_counts = np.array([len(co) for co in coords])
+    starts = np.cumsum(vertex_counts) - vertex_counts
+    result = _resample(np.concatenate(coords), starts, vertex_counts, ns)
+    return np.split(result, np.cumsum(ns)[:-1])